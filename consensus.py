@@ -0,0 +1,330 @@
+"""Merge crowd-sourced match submissions into one consensus record per match.
+
+Submissions come from the local submission queue (every row the match input
+form has taken), an optional CSV export of the Google Sheet, and the legacy
+submissions.csv. Player names are resolved to canonical IDs, then each match's
+submissions vote on the line-up, scorers and goal times, attendance and kit
+colours. Every consensus value carries a confidence: the share of the match's
+submissions that agree with it.
+
+Only matches with a submission newer than the stored watermark are re-voted;
+their earlier submissions are re-read so the vote always covers all of them.
+
+    python consensus.py [--sheet-csv export.csv] [--full]
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from player_names import build_index, player_id
+from submission_queue import QUEUE_PATH
+
+LEGACY_CSV = "submissions.csv"
+STORE_DIR = "match-consensus"
+MANIFEST = "manifest.json"
+
+# Column order of the rows written by oafc-match-input.py
+STARTER_SLOTS = [f"oafc_no{i}" for i in range(1, 12)]
+SUB_SLOTS = [f"oafc_usedsub{i}" for i in range(1, 6)]
+GOAL_SLOTS = [(f"oafc_scorer{i}", f"oafc_goaltime{i}") for i in range(1, 12)]
+SUBMISSION_FIELDS = (
+    ["timestamp", "match_label", "rating", "total_attendance", "away_attendance",
+     "away_fan_location", "oafc_colour", "opp_colour"]
+    + STARTER_SLOTS + SUB_SLOTS + ["oafc_unusedsubs"]
+    + [f for pair in GOAL_SLOTS for f in pair]
+    + ["notes", "author", "player_ids"]
+)
+# Legacy submissions.csv rows, by field count (used when no header row precedes them)
+LEGACY_FIELDS = {
+    5: ["timestamp", "match_id", "match_label", "rating", "notes"],
+    7: ["timestamp", "match_label", "rating", "total_attendance", "away_attendance", "oafc_colour", "notes"],
+    8: ["timestamp", "match_label", "rating", "total_attendance", "away_attendance", "oafc_colour", "opp_colour", "notes"],
+    34: (["timestamp", "match_label", "rating", "total_attendance", "away_attendance", "oafc_colour", "opp_colour"]
+         + STARTER_SLOTS + SUB_SLOTS + [f for pair in GOAL_SLOTS[:5] for f in pair] + ["notes"]),
+}
+# Google Sheet rows by field count: the queue appends an idempotency key, and
+# rows written directly by the form before the queue existed have none
+SHEET_FIELDS = {
+    len(SUBMISSION_FIELDS) + 1: SUBMISSION_FIELDS + ["key"],
+    # Queued before the player ID map was added
+    len(SUBMISSION_FIELDS): SUBMISSION_FIELDS[:-1] + ["key"],
+    len(SUBMISSION_FIELDS) - 1: SUBMISSION_FIELDS[:-1],
+}
+# The form writes UTC timestamps with their offset; older rows are naive server-local time
+AWARE_RE = r"(?:Z|[+-]\d{2}:?\d{2})$"
+ROLES = {**{s: "start" for s in STARTER_SLOTS}, **{s: "sub" for s in SUB_SLOTS}, "oafc_unusedsubs": "unused"}
+MINUTE_RE = re.compile(r"(\d+)(?:\s*\+\s*(\d+))?")
+
+
+# ---------- Reading submissions ----------
+def _frame(rows, fields, source: str) -> pd.DataFrame:
+    df = pd.DataFrame([r[:len(fields)] + [None] * (len(fields) - len(r)) for r in rows], columns=fields)
+    df["source"] = source
+    return df
+
+
+def read_queue(since: float, path: str = QUEUE_PATH) -> pd.DataFrame:
+    """Every queued submission for the matches that gained one after `since` (epoch seconds)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=SUBMISSION_FIELDS + ["key", "created", "source"])
+    con = sqlite3.connect(path)
+    try:
+        # The match label is the payload's second field; filter in SQLite so old matches are never parsed
+        rows = con.execute(
+            "SELECT key, created, payload FROM submissions WHERE json_extract(payload, '$[1]') IN "
+            "(SELECT json_extract(payload, '$[1]') FROM submissions WHERE created > ?)",
+            (since,),
+        ).fetchall()
+    finally:
+        con.close()
+    df = _frame([json.loads(payload) for _, _, payload in rows], SUBMISSION_FIELDS, "queue")
+    df["key"] = [key for key, _, _ in rows]
+    df["created"] = [created for _, created, _ in rows]
+    return df
+
+
+def read_sheet_export(path: str) -> pd.DataFrame:
+    """Rows from a CSV export of the Google Sheet, laid out by SHEET_FIELDS.
+
+    Rows without an idempotency key get key NA, so they are never deduplicated
+    against each other. Rows of any other length are logged and skipped.
+    """
+    groups = {}
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.reader(f), 1):
+            if not row or row[0] == "timestamp":
+                continue
+            fields = SHEET_FIELDS.get(len(row))
+            if fields is None:
+                logging.getLogger(__name__).warning("%s:%d: skipping %d-field row with no known layout", path, line, len(row))
+                continue
+            groups.setdefault(tuple(fields), []).append(row)
+    parts = [_frame(rows, list(fields), "sheet") for fields, rows in groups.items()]
+    df = pd.concat(parts, ignore_index=True) if parts else _frame([], SUBMISSION_FIELDS, "sheet")
+    df = df.reindex(columns=[*SUBMISSION_FIELDS, "key", "source"])
+    df["key"] = df["key"].astype(object).where(df["key"].notna(), pd.NA)
+    return df
+
+
+def read_legacy(path: str = LEGACY_CSV) -> pd.DataFrame:
+    """submissions.csv, whose rows have grown columns over time.
+
+    A header row sets the layout of the rows that follow it; rows without a
+    matching header fall back to LEGACY_FIELDS by field count. Rows of any
+    other length are logged and skipped.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["timestamp", "match_label", "source"])
+    groups, header = {}, None
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.reader(f), 1):
+            if not row:
+                continue
+            if row[0] == "timestamp":
+                header = row
+                continue
+            fields = header if header and len(header) == len(row) else LEGACY_FIELDS.get(len(row))
+            if fields is None:
+                logging.getLogger(__name__).warning("%s:%d: skipping %d-field row with no known layout", path, line, len(row))
+                continue
+            groups.setdefault(tuple(fields), []).append(row)
+    parts = [_frame(rows, list(fields), "legacy") for fields, rows in groups.items()]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["timestamp", "match_label", "source"])
+
+
+def _epoch_seconds(timestamps: pd.Series) -> pd.Series:
+    """Form timestamps as epoch seconds; naive ones are read as this machine's local time."""
+    text = timestamps.astype(str).str.strip()
+    aware = text.str.contains(AWARE_RE)
+    seconds = pd.Series(np.nan, index=timestamps.index)
+    stamp = pd.to_datetime(text[aware], errors="coerce", format="mixed", utc=True)
+    seconds[aware] = (stamp - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+    # mktime applies the local zone's DST rules for each date
+    naive = pd.to_datetime(text[~aware], errors="coerce", format="mixed")
+    seconds[~aware] = [time.mktime(t.timetuple()) if pd.notna(t) else np.nan for t in naive]
+    return seconds
+
+
+def read_submissions(since: float, sheet_csv: str | None = None, legacy_csv: str = LEGACY_CSV) -> pd.DataFrame:
+    """All submissions for matches with something new since the watermark, one row per submission."""
+    frames = [read_queue(since), read_legacy(legacy_csv)]
+    if sheet_csv:
+        frames.append(read_sheet_export(sheet_csv))
+    df = pd.concat(frames, ignore_index=True)
+
+    # Queue rows carry their enqueue time; the others fall back to the form's timestamp
+    df["created"] = pd.to_numeric(df["created"]).fillna(_epoch_seconds(df["timestamp"]))
+    # Rows reach the sheet from the queue, so keep one copy of each key
+    df = df[df["key"].isna() | ~df["key"].duplicated()]
+    fresh = df.loc[df["created"] > since, "match_label"].unique()
+    return df[df["match_label"].isin(fresh)].reset_index(drop=True)
+
+
+# ---------- Claims ----------
+def _minute(text) -> float:
+    m = MINUTE_RE.search(str(text)) if pd.notna(text) else None
+    return int(m.group(1)) + int(m.group(2) or 0) if m else np.nan
+
+
+def _melt(subs: pd.DataFrame, cols) -> pd.DataFrame:
+    # Column-major, so the k-th scorer and k-th goal time rows line up
+    return subs[list(cols)].melt(ignore_index=False, var_name="slot", value_name="raw")
+
+
+def player_claims(subs: pd.DataFrame, index) -> pd.DataFrame:
+    """Long table of (submission, match_label, slot, role, player_id, name, minute) for every player entry."""
+    squad = _melt(subs, ROLES).dropna(subset=["raw"])
+    squad["role"] = squad["slot"].map(ROLES)
+    # Unused subs may be a comma-separated list
+    squad["raw"] = squad["raw"].astype(str).str.split(",")
+    squad = squad.explode("raw")
+
+    scorers, times = zip(*GOAL_SLOTS)
+    goals = _melt(subs, scorers)
+    goals["role"] = "goal"
+    goals["minute"] = _melt(subs, times)["raw"].map(_minute).to_numpy()
+
+    claims = pd.concat([squad, goals]).dropna(subset=["raw"])
+    claims["raw"] = claims["raw"].astype(str).str.strip()
+    claims = claims[claims["raw"] != ""]
+
+    # Resolve each distinct spelling once; unresolved text keeps a slug of itself as its ID
+    lookup = {}
+    for raw in claims["raw"].unique():
+        match = index.canonical(raw)
+        lookup[raw] = match if match else (player_id(raw), raw)
+    claims["player_id"] = claims["raw"].map(lambda r: lookup[r][0])
+    claims["name"] = claims["raw"].map(lambda r: lookup[r][1])
+    claims["match_label"] = subs["match_label"].reindex(claims.index).to_numpy()
+    return claims.rename_axis("submission").reset_index()
+
+
+# ---------- Voting ----------
+def _top(counts: pd.Series, by) -> pd.DataFrame:
+    """Most frequent value within each `by` group of a value-count series (ties go to the larger value)."""
+    frame = counts.rename("n").reset_index()
+    value = frame.columns[len(by)]
+    return frame.sort_values(["n", value], ascending=False, kind="stable").drop_duplicates(by).set_index(by)
+
+
+def vote_lineups(claims: pd.DataFrame) -> pd.DataFrame:
+    """Consensus squad per match: each player's majority role, shirt slot and confidence."""
+    squad = claims[claims["role"] != "goal"]
+    voters = squad.groupby("match_label")["submission"].nunique().rename("voters")
+    votes = squad.groupby(["match_label", "player_id", "role"]).agg(
+        votes=("submission", "nunique"), name=("name", "first")).reset_index()
+    slots = _top(squad.groupby(["match_label", "player_id", "role", "slot"]).size(), ["match_label", "player_id", "role"])
+    votes = votes.join(slots["slot"], on=["match_label", "player_id", "role"])
+    # Majority role per player, kept when more than half the match's line-up submissions name them
+    votes = votes.sort_values("votes", ascending=False, kind="stable").drop_duplicates(["match_label", "player_id"])
+    votes = votes.join(voters, on="match_label")
+    votes["confidence"] = (votes["votes"] / votes["voters"]).round(3)
+    votes["slot"] = pd.Categorical(votes["slot"], categories=list(ROLES))
+    votes = votes[votes["votes"] * 2 > votes["voters"]].sort_values(["match_label", "slot", "player_id"])
+    return votes[["match_label", "player_id", "name", "role", "slot", "votes", "voters", "confidence"]].reset_index(drop=True)
+
+
+def vote_goals(claims: pd.DataFrame) -> pd.DataFrame:
+    """Consensus goals per match: modal goal count per scorer and the most-reported minutes."""
+    goals = claims[claims["role"] == "goal"]
+    keys = ["match_label", "player_id"]
+    voters = goals.groupby("match_label")["submission"].nunique().rename("voters")
+    named = goals.groupby(keys)["submission"].nunique().rename("named")
+    counts = goals.groupby(keys + ["submission"]).size().rename("goals").reset_index()
+    modal = _top(counts.groupby(keys + ["goals"]).size(), keys)
+
+    minutes = goals.groupby(keys + ["minute"], dropna=False).agg(
+        votes=("submission", "nunique"), name=("name", "first")).reset_index()
+    minutes = minutes.sort_values(keys + ["votes", "minute"], ascending=[True, True, False, True])
+    minutes["rank"] = minutes.groupby(keys).cumcount()
+    minutes = minutes.join(modal, on=keys).join(named, on=keys).join(voters, on="match_label")
+
+    # A scorer counts when a majority named them; confidence is agreement on their goal count
+    minutes = minutes[(minutes["rank"] < minutes["goals"]) & (minutes["named"] * 2 > minutes["voters"])].copy()
+    minutes["confidence"] = (minutes["n"] / minutes["voters"]).round(3)
+    minutes["minute"] = minutes["minute"].astype("Int16")
+    return minutes[keys + ["name", "minute", "votes", "voters", "confidence"]].reset_index(drop=True)
+
+
+def vote_matches(subs: pd.DataFrame) -> pd.DataFrame:
+    """Per-match attendance (median of reported figures) and kit colours (mode), with confidences."""
+    by_match = subs.groupby("match_label")
+    matches = pd.DataFrame({"submissions": by_match.size(), "last_submitted": by_match["created"].max()})
+
+    for col in ("total_attendance", "away_attendance"):
+        values = pd.to_numeric(subs[col], errors="coerce")
+        values = values.where(values > 0)
+        centre = values.groupby(subs["match_label"]).median()
+        # Within 2% of the median counts as agreeing
+        agree = (values - subs["match_label"].map(centre)).abs() <= 0.02 * subs["match_label"].map(centre)
+        matches[col] = centre.round().astype("Int64")
+        matches[f"{col}_confidence"] = agree[values.notna()].groupby(subs["match_label"]).mean().round(3)
+
+    for col in ("oafc_colour", "opp_colour", "away_fan_location"):
+        values = subs[col].where(~subs[col].isin(["", "Don't know"]))
+        top = _top(values.groupby(subs["match_label"]).value_counts(), ["match_label"])
+        matches[col] = top[col]
+        matches[f"{col}_confidence"] = (top["n"] / values.groupby(subs["match_label"]).count()).round(3)
+    return matches.rename_axis("match_label").reset_index()
+
+
+# ---------- Store ----------
+def _read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"watermark": 0.0}
+
+
+def _merge(root: str, name: str, fresh: pd.DataFrame, labels) -> pd.DataFrame:
+    """Replace the re-voted matches' rows in one consensus table."""
+    path = os.path.join(root, f"{name}.arrow")
+    if os.path.exists(path):
+        old = feather.read_feather(path)
+        fresh = pd.concat([old[~old["match_label"].isin(labels)], fresh], ignore_index=True)
+    fresh = fresh.sort_values("match_label", kind="stable").reset_index(drop=True)
+    feather.write_feather(fresh, path)
+    return fresh
+
+
+def build_consensus(sheet_csv: str | None = None, root: str = STORE_DIR, full: bool = False) -> dict:
+    """Re-vote the matches with new submissions since the watermark; return the manifest."""
+    manifest = {"watermark": 0.0} if full else _read_manifest(root)
+    subs = read_submissions(manifest["watermark"], sheet_csv)
+    if subs.empty:
+        return {**manifest, "updated": 0}
+
+    claims = player_claims(subs, build_index())
+    labels = subs["match_label"].unique()
+    os.makedirs(root, exist_ok=True)
+    _merge(root, "matches", vote_matches(subs), labels)
+    _merge(root, "lineups", vote_lineups(claims), labels)
+    _merge(root, "goals", vote_goals(claims), labels)
+
+    manifest = {"watermark": float(subs["created"].max()), "updated": len(labels)}
+    with open(os.path.join(root, MANIFEST), "w") as f:
+        json.dump({"watermark": manifest["watermark"]}, f, indent=1)
+    return manifest
+
+
+def load_consensus(root: str = STORE_DIR) -> dict[str, pd.DataFrame]:
+    return {name: feather.read_feather(os.path.join(root, f"{name}.arrow")) for name in ("matches", "lineups", "goals")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheet-csv", help="CSV export of the Google Sheet")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and re-vote every match")
+    args = parser.parse_args()
+    manifest = build_consensus(args.sheet_csv, full=args.full)
+    print(f"{manifest['updated']} matches updated in {STORE_DIR}/")
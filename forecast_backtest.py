@@ -0,0 +1,160 @@
+"""Backtest of forcPH/forcPD/forcPA and xG1/xG2 over every played match.
+
+Each div/season partition is scored in one vectorised pass in a worker
+process: multi-class Brier score, log-loss and ranked probability score for
+the outcome probabilities, absolute and squared error of xG1/xG2 against
+goals1/goals2, and calibration counts (forecasts binned per outcome, with the
+observed frequency in each bin). Workers return sums, so partitions combine
+into per-division, per-season and overall figures exactly.
+
+Sources are compared side by side: the partitioned match store (the
+forecasts the predictions app serves), any other CSVs with the same columns
+(e.g. a candidate model's output), and optionally rating_model refitted from
+scratch on the archive's results.
+
+    python forecast_backtest.py [--csv PATH ...] [--rating-model] [--workers N] [--by div|season]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import match_store
+import rating_model
+
+PROB_COLS = ["forcPH", "forcPD", "forcPA"]
+OUTCOMES = ["home", "draw", "away"]
+CALIBRATION_BINS = 10
+# Probabilities are clipped before taking logs so a confident miss costs a finite amount
+EPS = 1e-6
+SUMS = ["brier", "log_loss", "rps", "xg_abs", "xg_sq"]
+
+
+# ---------- Scoring ----------
+def score(matches: pd.DataFrame) -> dict:
+    """Metric sums and calibration counts for the played matches of one partition.
+
+    Probability metrics and calibration cover matches with all three
+    probabilities; xG error covers each xG value that is present. Each set
+    keeps its own count so means are taken over what was scored.
+    """
+    played = matches[matches["goals1"].notna() & matches["goals2"].notna()]
+    g1, g2 = played["goals1"].to_numpy(float), played["goals2"].to_numpy(float)
+    outcome = np.select([g1 > g2, g1 == g2], [0, 1], 2)
+
+    probs = played[PROB_COLS].to_numpy(float)
+    has_probs = ~np.isnan(probs).any(axis=1)
+    probs, outcome = probs[has_probs], outcome[has_probs]
+    observed = np.eye(3)[outcome]
+
+    xg_err = np.column_stack([played["xG1"].to_numpy(float) - g1, played["xG2"].to_numpy(float) - g2])
+    sums = {
+        "matches": len(played),
+        "prob_matches": len(probs),
+        "xg_values": int((~np.isnan(xg_err)).sum()),
+        "brier": ((probs - observed) ** 2).sum(),
+        "log_loss": -np.log(np.clip(probs[np.arange(len(probs)), outcome], EPS, 1)).sum(),
+        # Outcomes are ordered home > draw > away, so RPS compares cumulative distributions
+        "rps": 0.5 * ((probs.cumsum(axis=1) - observed.cumsum(axis=1))[:, :2] ** 2).sum(),
+        "xg_abs": np.nansum(np.abs(xg_err)),
+        "xg_sq": np.nansum(xg_err ** 2),
+    }
+
+    # Calibration: per outcome and probability bin, count, summed forecast and summed result
+    bins = np.clip((probs * CALIBRATION_BINS).astype(int), 0, CALIBRATION_BINS - 1)
+    cells = (np.arange(3) * CALIBRATION_BINS + bins).ravel()
+    size = 3 * CALIBRATION_BINS
+    sums["calibration"] = np.stack([
+        np.bincount(cells, minlength=size),
+        np.bincount(cells, weights=probs.ravel(), minlength=size),
+        np.bincount(cells, weights=observed.ravel(), minlength=size),
+    ])
+    return sums
+
+
+def summarise(scores: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    """Per-match means of every metric, grouped by `by` (all rows when empty)."""
+    counts = ["matches", "prob_matches", "xg_values"]
+    totals = scores.groupby(by)[[*counts, *SUMS]].sum() if by else scores[[*counts, *SUMS]].sum().to_frame().T
+    table = totals[counts].astype(int)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for col in ["brier", "log_loss", "rps"]:
+            table[col] = totals[col] / totals["prob_matches"]
+        table["xg_mae"] = totals["xg_abs"] / totals["xg_values"]
+        table["xg_rmse"] = np.sqrt(totals["xg_sq"] / totals["xg_values"])
+    return table.round(4)
+
+
+def calibration(scores: pd.DataFrame) -> pd.DataFrame:
+    """Calibration curve rows: outcome, bin, matches, mean forecast and observed frequency."""
+    count, forecast, observed = np.sum(scores["calibration"].tolist(), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        curve = pd.DataFrame({
+            "outcome": np.repeat(OUTCOMES, CALIBRATION_BINS),
+            "bin": np.tile(np.arange(CALIBRATION_BINS) / CALIBRATION_BINS, 3),
+            "matches": count.astype(int),
+            "forecast": forecast / count,
+            "observed": observed / count,
+        })
+    return curve[curve["matches"] > 0].round(3).reset_index(drop=True)
+
+
+# ---------- Sources ----------
+def _score_store_partition(key) -> dict:
+    div, season = key
+    return dict(score(match_store.load_partition(div, season)), div=div, season=season)
+
+
+def _score_frame(item) -> dict:
+    (div, season), rows = item
+    return dict(score(rows), div=div, season=season)
+
+
+def backtest_store(workers: int | None = None) -> pd.DataFrame:
+    """Scores for every partition of the match store, one row per div/season."""
+    match_store.build_store()
+    keys = [(p.div, p.season) for p in match_store.list_partitions().itertuples()]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return pd.DataFrame(list(pool.map(_score_store_partition, keys)))
+
+
+def backtest_frame(matches: pd.DataFrame, workers: int | None = None) -> pd.DataFrame:
+    """Scores for an in-memory archive (e.g. a candidate CSV), one row per div/season."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return pd.DataFrame(list(pool.map(_score_frame, matches.groupby(["div", "season"]))))
+
+
+def rating_model_forecasts(matches: pd.DataFrame) -> pd.DataFrame:
+    """The archive with its forecast columns replaced by a from-scratch rating_model fit."""
+    with tempfile.TemporaryDirectory() as root:
+        return rating_model.update_forecasts(matches, root=root, refit=True)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", nargs="*", default=[], help="other forecast CSVs to score alongside the store")
+    parser.add_argument("--rating-model", action="store_true", help="also score rating_model fitted on the archive")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--by", choices=["div", "season"], help="break the comparison down by division or season")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sources = {"store": backtest_store(args.workers)}
+    for path in args.csv:
+        sources[os.path.basename(path)] = backtest_frame(pd.read_csv(path), args.workers)
+    if args.rating_model:
+        archive = pd.read_csv(match_store.SOURCE_CSV)
+        sources["rating_model"] = backtest_frame(rating_model_forecasts(archive), args.workers)
+
+    by = [args.by] if args.by else []
+    comparison = pd.concat({name: summarise(scores, by) for name, scores in sources.items()}, names=["source"])
+    print(comparison.droplevel(-1).to_string() if not by else comparison.to_string())
+    for name, scores in sources.items():
+        print(f"\nCalibration ({name})")
+        print(calibration(scores).to_string(index=False))
+    print(f"\n{sum(s['matches'].sum() for s in sources.values())} matches scored "
+          f"in {time.perf_counter() - start:.2f}s")
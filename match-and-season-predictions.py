@@ -1,20 +1,32 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import altair as alt
+import os
+import threading
+
+import match_store
 
 # ---------- LOAD DATA ----------
+# all-eng-matches.csv is split into per-div/season Arrow files by match_store;
+# only the selected partition is ever read into memory.
+match_store.build_store()
+
 @st.cache_data
-def load_data():
-    # Replace with your CSV file path
-    df = pd.read_csv("all-eng-matches.csv", parse_dates=["date"])
-    return df
+def load_partitions(manifest_mtime):
+    return match_store.list_partitions()
 
-df = load_data()
+@st.cache_data
+def load_data(div, season, partition_hash):
+    return match_store.load_partition(div, season)
+
+partitions = load_partitions(os.path.getmtime(os.path.join(match_store.STORE_DIR, match_store.MANIFEST)))
 
 # ---------- SIDEBAR SELECTION ----------
 st.sidebar.header("Filters")
 
-divisions = sorted(df["div"].unique())
-seasons = sorted(df["season"].unique())
+divisions = sorted(partitions["div"].unique())
+seasons = sorted(partitions["season"].unique())
 
 # Find the index for 'div4'
 default_div_index = divisions.index("div4") if "div4" in divisions else 0
@@ -25,7 +37,12 @@ default_season_index = seasons.index(2025) if 2025 in seasons else 0
 selected_div = st.sidebar.selectbox("Select Division", divisions, index=default_div_index)
 selected_season = st.sidebar.selectbox("Select Season", seasons, index=default_season_index)
 
-df_filtered = df[(df["div"] == selected_div) & (df["season"] == selected_season)]
+selected_partition = partitions[(partitions["div"] == selected_div) & (partitions["season"] == selected_season)]
+if selected_partition.empty:
+    st.warning(f"No matches for {selected_div} in {selected_season}.")
+    st.stop()
+
+df_filtered = load_data(selected_div, selected_season, selected_partition["hash"].iloc[0]).copy()
 
 df_filtered["date"] = df_filtered["date"].dt.strftime("%Y-%m-%d")
 
@@ -40,8 +57,329 @@ matches_display["xG2"] = matches_display["xG2"].round(2)
 # Get the full league name for the selected div
 full_division_name = df_filtered["division"].iloc[0]
 
+played = df_filtered.dropna(subset=["goals1", "goals2"])
+unplayed = df_filtered[df_filtered[["goals1", "goals2"]].isna().any(axis=1)]
+
+# ---------- LEAGUE TABLES ----------
+TABLE_KEYS = ["div", "season"]
+
+def league_tables(matches: pd.DataFrame):
+    """Actual, predicted and hybrid tables for every div/season in `matches`, from one scatter-add pass."""
+    n = len(matches)
+
+    # Integer code per (div, season, team), shared by the home and away sides
+    sides = pd.concat([
+        matches[TABLE_KEYS + ["team1"]].set_axis(TABLE_KEYS + ["team"], axis=1),
+        matches[TABLE_KEYS + ["team2"]].set_axis(TABLE_KEYS + ["team"], axis=1),
+    ], ignore_index=True)
+    codes, uniques = pd.MultiIndex.from_frame(sides).factorize()
+    n_codes = len(uniques)
+
+    g1 = matches["goals1"].to_numpy(dtype=float)
+    g2 = matches["goals2"].to_numpy(dtype=float)
+    is_played = ~(np.isnan(g1) | np.isnan(g2))
+    g1, g2 = np.nan_to_num(g1), np.nan_to_num(g2)
+    p_home = matches["forcPH"].to_numpy(dtype=float)
+    p_draw = matches["forcPD"].to_numpy(dtype=float)
+    p_away = matches["forcPA"].to_numpy(dtype=float)
+    xg1 = matches["xG1"].to_numpy(dtype=float)
+    xg2 = matches["xG2"].to_numpy(dtype=float)
+
+    # Per-fixture contributions as (home, away) pairs, stacked to line up with `codes`
+    won, drawn = (g1 > g2) & is_played, (g1 == g2) & is_played
+    lost = (g1 < g2) & is_played
+    exp_home, exp_away = 3 * p_home + p_draw, 3 * p_away + p_draw
+    contributions = {
+        "played": (is_played, is_played),
+        "won": (won, lost),
+        "drawn": (drawn, drawn),
+        "lost": (lost, won),
+        "gf": (g1, g2),
+        "ga": (g2, g1),
+        "points": (3 * won + drawn, 3 * lost + drawn),
+        "exp_points": (exp_home, exp_away),
+        "exp_gd": (xg1 - xg2, xg2 - xg1),
+        "points_predicted": (exp_home * ~is_played, exp_away * ~is_played),
+        "gd_predicted": ((xg1 - xg2) * ~is_played, (xg2 - xg1) * ~is_played),
+    }
+    totals = pd.DataFrame({
+        name: np.bincount(codes, np.nan_to_num(np.concatenate([home, away]).astype(float)), n_codes)
+        for name, (home, away) in contributions.items()
+    })
+    totals = pd.concat([uniques.to_frame(index=False, name=TABLE_KEYS + ["team"]), totals], axis=1)
+    counts = ["played", "won", "drawn", "lost", "gf", "ga", "points"]
+    totals[counts] = totals[counts].astype(int)
+    totals["gd"] = totals["gf"] - totals["ga"]
+    totals["total_points"] = totals["points"] + totals["points_predicted"]
+    totals["total_gd"] = totals["gd"] + totals["gd_predicted"]
+
+    def ranked(cols, sort_by):
+        table = totals[TABLE_KEYS + ["team"] + cols].sort_values(
+            TABLE_KEYS + sort_by, ascending=[True] * len(TABLE_KEYS) + [False] * len(sort_by)
+        )
+        table.index = table.groupby(TABLE_KEYS).cumcount() + 1
+        return table.set_index(TABLE_KEYS, append=True).reorder_levels(TABLE_KEYS + [None])
+
+    actual = ranked(["played", "won", "drawn", "lost", "gf", "ga", "gd", "points"], ["points", "gd", "gf"])
+    predicted = ranked(["exp_points", "exp_gd"], ["exp_points", "exp_gd"])
+    hybrid = ranked(["points", "points_predicted", "gd", "gd_predicted", "total_points", "total_gd"],
+                    ["total_points", "total_gd"])
+    return actual, predicted, hybrid
+
+@st.cache_data
+def season_tables(div, season, partition_hash):
+    matches = load_data(div, season, partition_hash)
+    return tuple(table.loc[(div, season)] for table in league_tables(matches))
+
+# ---------- TABLE TIMELINE ----------
+class StandingsTimeline:
+    """Cumulative per-team standings after each match date of one season.
+
+    Rows of points/gd/gf/played are prefix sums over the date-sorted results, so
+    the table at any date is one row lookup plus a sort. New results only touch
+    rows from their own date onwards.
+    """
+
+    def __init__(self, teams):
+        self.teams = list(teams)
+        self.codes = {t: i for i, t in enumerate(self.teams)}
+        # Shared across sessions by st.cache_resource, which run in separate threads
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        n = len(self.teams)
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.stats = {name: np.zeros((0, n), dtype=int) for name in ("played", "points", "gd", "gf")}
+        # Home/away pairing -> "date|goals1|goals2" of every result applied so far
+        self.applied = pd.Series(dtype=object)
+
+    def update(self, results: pd.DataFrame):
+        """Fold in any results not already applied; a corrected or removed result rebuilds from scratch."""
+        keys = results["team1"].astype(str) + "|" + results["team2"].astype(str)
+        current = pd.Series(
+            (results["date"].astype(str) + "|" + results["goals1"].astype(str) + "|" + results["goals2"].astype(str)).to_numpy(),
+            index=keys.to_numpy(),
+        )
+        with self.lock:
+            if len(self.applied) and not current.reindex(self.applied.index).equals(self.applied):
+                self._reset()
+            new = results[~keys.isin(self.applied.index).to_numpy()]
+            if not new.empty:
+                self._apply(new)
+                self.applied = current
+
+    def _apply(self, new: pd.DataFrame):
+        # Insert rows for unseen dates, carrying forward the standings before them
+        new_dates = pd.to_datetime(new["date"]).to_numpy(dtype="datetime64[ns]")
+        dates = np.union1d(self.dates, new_dates)
+        prev = np.searchsorted(self.dates, dates, side="right") - 1
+        for name, arr in self.stats.items():
+            carried = arr[np.maximum(prev, 0)] if len(arr) else np.zeros((len(dates), len(self.teams)), dtype=int)
+            carried[prev < 0] = 0
+            self.stats[name] = carried
+        self.dates = dates
+
+        # Scatter the new results onto (date, team) cells, then prefix-sum from the first affected date
+        n = len(self.teams)
+        row = np.searchsorted(self.dates, new_dates)
+        start = row.min()
+        h = new["team1"].map(self.codes).to_numpy(dtype=int)
+        a = new["team2"].map(self.codes).to_numpy(dtype=int)
+        g1 = new["goals1"].to_numpy(dtype=int)
+        g2 = new["goals2"].to_numpy(dtype=int)
+        cells = np.concatenate([(row - start) * n + h, (row - start) * n + a])
+        deltas = {
+            "played": np.ones(2 * len(new)),
+            "points": np.concatenate([3 * (g1 > g2) + (g1 == g2), 3 * (g2 > g1) + (g1 == g2)]),
+            "gd": np.concatenate([g1 - g2, g2 - g1]),
+            "gf": np.concatenate([g1, g2]),
+        }
+        n_rows = len(self.dates) - start
+        for name, weights in deltas.items():
+            delta = np.bincount(cells, weights, n_rows * n).reshape(n_rows, n).astype(int)
+            self.stats[name][start:] += delta.cumsum(axis=0)
+
+    def table_at(self, date) -> pd.DataFrame:
+        with self.lock:
+            return self._table_at(date)
+
+    def _table_at(self, date) -> pd.DataFrame:
+        i = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date), "ns"), side="right") - 1
+        table = pd.DataFrame({"team": self.teams})
+        for name, arr in self.stats.items():
+            table[name] = arr[i] if i >= 0 else 0
+        table = table.sort_values(["points", "gd", "gf"], ascending=False).reset_index(drop=True)
+        table.index = table.index + 1
+        return table
+
+    def positions(self) -> pd.DataFrame:
+        """League position of every team after every match date."""
+        with self.lock:
+            return self._positions()
+
+    def _positions(self) -> pd.DataFrame:
+        order = np.lexsort((-self.stats["gf"], -self.stats["gd"], -self.stats["points"]), axis=-1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(1, len(self.teams) + 1), axis=1)
+        return pd.DataFrame(positions, index=pd.Index(self.dates, name="date"), columns=self.teams)
+
+@st.cache_resource
+def season_timeline(div, season, teams):
+    # One timeline per div/season for the life of the app; update() adds only new results
+    return StandingsTimeline(teams)
+
+# ---------- SEASON SIMULATION ----------
+N_SIMS = 10000
+
+# Promotion / play-off / relegation places per division (current EFL format).
+# Negative positions count up from the bottom of the table.
+ZONES = {
+    "div1": [("Champions", 1, 1), ("Relegated", -3, -1)],
+    "div2": [("Promoted", 1, 2), ("Play-offs", 3, 6), ("Relegated", -3, -1)],
+    "div3": [("Promoted", 1, 2), ("Play-offs", 3, 6), ("Relegated", -4, -1)],
+    "div4": [("Promoted", 1, 3), ("Play-offs", 4, 7), ("Relegated", -2, -1)],
+}
+
+def zone_places(div: str, n_teams: int):
+    """ZONES for the division with places resolved to 1-based (label, first, last)."""
+    return [(label, first if first > 0 else n_teams + first + 1, last if last > 0 else n_teams + last + 1)
+            for label, first, last in ZONES.get(div, [])]
+
+def simulate_season(played: pd.DataFrame, unplayed: pd.DataFrame, n_sims: int = N_SIMS, seed: int = 0):
+    """Monte Carlo the unplayed fixtures; return (teams, positions, outcomes).
+
+    positions is shaped (n_sims, n_teams); outcomes (n_sims, n_fixtures) holds each
+    simulated result as 0 (home win), 1 (draw) or 2 (away win).
+    """
+    teams = sorted(set(played["team1"]) | set(played["team2"]) | set(unplayed["team1"]) | set(unplayed["team2"]))
+    n_teams = len(teams)
+    codes = {t: i for i, t in enumerate(teams)}
+    rng = np.random.default_rng(seed)
+
+    # Points, goal difference and goals scored from results so far
+    h = played["team1"].map(codes).to_numpy()
+    a = played["team2"].map(codes).to_numpy()
+    g1 = played["goals1"].to_numpy(dtype=float)
+    g2 = played["goals2"].to_numpy(dtype=float)
+    pts1 = 3 * (g1 > g2) + (g1 == g2)
+    pts2 = 3 * (g2 > g1) + (g1 == g2)
+    base_pts = np.bincount(h, pts1, n_teams) + np.bincount(a, pts2, n_teams)
+    base_gd = np.bincount(h, g1 - g2, n_teams) + np.bincount(a, g2 - g1, n_teams)
+    base_gf = np.bincount(h, g1, n_teams) + np.bincount(a, g2, n_teams)
+
+    # One batch of outcomes for every remaining fixture: (n_sims, n_fixtures)
+    n_fix = len(unplayed)
+    u = rng.random((n_sims, n_fix))
+    p_home = unplayed["forcPH"].to_numpy(dtype=float)
+    p_draw = unplayed["forcPD"].to_numpy(dtype=float)
+    home_win = u < p_home
+    draw = ~home_win & (u < p_home + p_draw)
+    away_win = ~home_win & ~draw
+
+    # Scorelines from the xG columns, nudged to agree with the drawn outcome
+    s1 = rng.poisson(unplayed["xG1"].fillna(0).clip(lower=0).to_numpy(), (n_sims, n_fix))
+    s2 = rng.poisson(unplayed["xG2"].fillna(0).clip(lower=0).to_numpy(), (n_sims, n_fix))
+    s1 = np.where(home_win, np.maximum(s1, s2 + 1), s1)
+    s2 = np.where(away_win, np.maximum(s2, s1 + 1), np.where(draw, s1, s2))
+
+    # Scatter fixture results onto teams with one-hot incidence matrices
+    home_inc = np.zeros((n_fix, n_teams))
+    away_inc = np.zeros((n_fix, n_teams))
+    home_inc[np.arange(n_fix), unplayed["team1"].map(codes).to_numpy()] = 1
+    away_inc[np.arange(n_fix), unplayed["team2"].map(codes).to_numpy()] = 1
+
+    pts = base_pts + (3 * home_win + draw) @ home_inc + (3 * away_win + draw) @ away_inc
+    gd = base_gd + (s1 - s2) @ home_inc + (s2 - s1) @ away_inc
+    gf = base_gf + s1 @ home_inc + s2 @ away_inc
+
+    # Rank on points, then goal difference, then goals scored; remaining ties broken at random
+    order = np.lexsort((rng.random((n_sims, n_teams)), -gf, -gd, -pts), axis=-1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_teams), axis=1)
+    outcomes = np.where(home_win, 0, np.where(draw, 1, 2)).astype(np.int8)
+    return teams, positions, outcomes
+
+@st.cache_data
+def season_outcomes(played: pd.DataFrame, unplayed: pd.DataFrame, n_sims: int = N_SIMS):
+    # One set of simulations shared by the zone probabilities and fixture importance
+    return simulate_season(played, unplayed, n_sims)
+
+@st.cache_data
+def season_simulation(played: pd.DataFrame, unplayed: pd.DataFrame, div: str, n_sims: int = N_SIMS):
+    """Finishing-position probability matrix plus zone probabilities for each team."""
+    teams, positions, _ = season_outcomes(played, unplayed, n_sims)
+    n_teams = len(teams)
+    team_idx = np.broadcast_to(np.arange(n_teams), positions.shape)
+    counts = np.bincount((team_idx * n_teams + positions).ravel(), minlength=n_teams * n_teams)
+    matrix = pd.DataFrame(
+        counts.reshape(n_teams, n_teams) / n_sims,
+        index=pd.Index(teams, name="team"),
+        columns=range(1, n_teams + 1),
+    )
+
+    zones = pd.DataFrame(index=matrix.index)
+    zones["Avg position"] = matrix.to_numpy() @ np.arange(1, n_teams + 1)
+    for label, first, last in zone_places(div, n_teams):
+        zones[label] = matrix.loc[:, first:last].sum(axis=1)
+    order = zones["Avg position"].sort_values().index
+    return matrix.loc[order], zones.loc[order]
+
+# A result needs this many simulations before its conditional zone chances count towards a swing
+MIN_RESULT_SIMS = 200
+
+@st.cache_data
+def fixture_importance(played: pd.DataFrame, unplayed: pd.DataFrame, div: str, n_sims: int = N_SIMS):
+    """Zone probabilities conditioned on each remaining fixture's result, from one batch of simulations.
+
+    Rather than re-simulating the season per fixture and result, the shared
+    simulations are masked to those where the fixture ended that way (common
+    random numbers), so every fixture is conditioned with three matrix
+    products. Returns (conditional, importance): conditional has a row per
+    fixture, team and zone with its probability after a home win, draw and
+    away win; importance has a row per fixture with its largest swing and
+    how many simulations each result was seen in. Results seen in fewer than
+    MIN_RESULT_SIMS simulations are left out (NaN), as their conditional
+    probabilities are mostly noise.
+    """
+    teams, positions, outcomes = season_outcomes(played, unplayed, n_sims)
+    zones = zone_places(div, len(teams))
+    # (n_sims, n_zones * n_teams): whether each team finished in each zone
+    in_zone = np.concatenate(
+        [(positions >= first - 1) & (positions <= last - 1) for _, first, last in zones], axis=1
+    ).astype(np.float32)
+
+    probs, counts = [], []
+    for result in range(3):
+        mask = (outcomes == result).astype(np.float32)
+        n = mask.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            probs.append((mask.T @ in_zone) / np.where(n >= MIN_RESULT_SIMS, n, np.nan)[:, None])
+        counts.append(n.astype(int))
+    probs = np.stack(probs, axis=-1)  # (n_fixtures, n_zones * n_teams, 3)
+
+    n_fix = len(unplayed)
+    conditional = pd.DataFrame({
+        "fixture": np.repeat(np.arange(n_fix), len(zones) * len(teams)),
+        "zone": np.tile(np.repeat([label for label, _, _ in zones], len(teams)), n_fix),
+        "team": np.tile(teams, len(zones) * n_fix),
+        "Home win": probs[..., 0].ravel(),
+        "Draw": probs[..., 1].ravel(),
+        "Away win": probs[..., 2].ravel(),
+    })
+    outcome_probs = conditional[["Home win", "Draw", "Away win"]]
+    conditional["Swing"] = outcome_probs.max(axis=1) - outcome_probs.min(axis=1)
+
+    top = conditional.loc[conditional.groupby("fixture")["Swing"].idxmax()]
+    importance = unplayed[["date", "team1", "team2", "forcPH", "forcPD", "forcPA"]].reset_index(drop=True)
+    importance["Importance"] = top["Swing"].to_numpy()
+    importance["Most affected"] = (top["team"] + " — " + top["zone"]).to_numpy()
+    for label, n in zip(["Home win", "Draw", "Away win"], counts):
+        importance[f"{label} sims"] = n
+    return conditional, importance
+
 # ---------- MAIN TABS ----------
-tab1, tab2 = st.tabs(["📅 Matches & Predictions", "📊 League Table"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["📅 Matches & Predictions", "📊 League Table", "🎲 Season Simulation", "📈 Table Timeline", "🎯 Fixture Importance"])
 
 # ---------- TAB 1 ----------
 with tab1:
@@ -57,104 +395,91 @@ with tab1:
 with tab2:
     st.subheader(f"League Table — {full_division_name}, {selected_season}")
 
-    played = df_filtered.dropna(subset=["goals1", "goals2"])
-    unplayed = df_filtered[df_filtered[["goals1", "goals2"]].isna().any(axis=1)]
+    actual_table, predicted_table, hybrid = season_tables(selected_div, selected_season, selected_partition["hash"].iloc[0])
 
     # --- Actual table ---
-    if played.empty:
-        actual_points = pd.DataFrame(columns=["team", "points"])
-    else:
-        actual_points_t1 = (
-            played.groupby("team1")
-            .apply(lambda x: (3*(x["goals1"] > x["goals2"]) + 1*(x["goals1"] == x["goals2"])).sum())
-            .rename("points_home")
-            .reset_index()
-        )
-    
-        actual_points_t2 = (
-            played.groupby("team2")
-            .apply(lambda x: (3*(x["goals2"] > x["goals1"]) + 1*(x["goals2"] == x["goals1"])).sum())
-            .rename("points_away")
-            .reset_index()
-        )
-    
-        actual_points = pd.merge(actual_points_t1, actual_points_t2, left_on="team1", right_on="team2", how="outer")
-        actual_points["team"] = actual_points["team1"].combine_first(actual_points["team2"])
-        actual_points["points"] = actual_points["points_home"].fillna(0) + actual_points["points_away"].fillna(0)
-        actual_points = actual_points[["team", "points"]]
-    
-        actual_gd_t1 = played.groupby("team1").apply(lambda x: (x["goals1"] - x["goals2"]).sum()).reset_index(name="gd_home")
-        actual_gd_t2 = played.groupby("team2").apply(lambda x: (x["goals2"] - x["goals1"]).sum()).reset_index(name="gd_away")
-        actual_gd = pd.merge(actual_gd_t1, actual_gd_t2, left_on="team1", right_on="team2", how="outer")
-        actual_gd["team"] = actual_gd["team1"].combine_first(actual_gd["team2"])
-        actual_gd["gd"] = actual_gd["gd_home"].fillna(0) + actual_gd["gd_away"].fillna(0)
-        actual_gd = actual_gd[["team", "gd"]]
-    
-        actual_table = pd.merge(actual_points, actual_gd, on="team").fillna(0)
-        actual_table = actual_table.sort_values(by=["points", "gd"], ascending=False).reset_index(drop=True)
-        actual_table.index = actual_table.index + 1
-    
+    if not played.empty:
         st.markdown("**Actual Table (Played Matches So Far)**")
         st.dataframe(actual_table)
 
     # --- Predicted table (full season) ---
-    pred_points_t1 = df_filtered.groupby("team1").apply(lambda x: (3 * x["forcPH"] + 1 * x["forcPD"]).sum()).reset_index(name="exp_points_home")
-    pred_points_t2 = df_filtered.groupby("team2").apply(lambda x: (3 * x["forcPA"] + 1 * x["forcPD"]).sum()).reset_index(name="exp_points_away")
-    pred_points = pd.merge(pred_points_t1, pred_points_t2, left_on="team1", right_on="team2", how="outer")
-    pred_points["team"] = pred_points["team1"].combine_first(pred_points["team2"])
-    pred_points["exp_points"] = pred_points["exp_points_home"].fillna(0) + pred_points["exp_points_away"].fillna(0)
-    pred_points = pred_points[["team", "exp_points"]]
-
-    exp_gd_t1 = df_filtered.groupby("team1").apply(lambda x: (x["xG1"] - x["xG2"]).sum()).reset_index(name="exp_gd_home")
-    exp_gd_t2 = df_filtered.groupby("team2").apply(lambda x: (x["xG2"] - x["xG1"]).sum()).reset_index(name="exp_gd_away")
-    exp_gd = pd.merge(exp_gd_t1, exp_gd_t2, left_on="team1", right_on="team2", how="outer")
-    exp_gd["team"] = exp_gd["team1"].combine_first(exp_gd["team2"])
-    exp_gd["exp_gd"] = exp_gd["exp_gd_home"].fillna(0) + exp_gd["exp_gd_away"].fillna(0)
-    exp_gd = exp_gd[["team", "exp_gd"]]
-
-    predicted_table = pd.merge(pred_points, exp_gd, on="team").fillna(0)
-    predicted_table = predicted_table.sort_values(by=["exp_points", "exp_gd"], ascending=False).reset_index(drop=True)
-    predicted_table.index = predicted_table.index + 1
-
     st.markdown("**Predicted Table (Full Season Forecast)**")
     st.dataframe(predicted_table)
 
     # --- Hybrid table: actual points so far + predicted points for unplayed matches ---
-    # Actual points so far
-    points_actual = actual_points.rename(columns={"points": "points_actual"})
-
-    # Predicted points for unplayed matches
-    pred_home = unplayed.groupby("team1").apply(lambda x: (3 * x["forcPH"] + 1 * x["forcPD"]).sum()).reset_index(name="points_home")
-    pred_away = unplayed.groupby("team2").apply(lambda x: (3 * x["forcPA"] + 1 * x["forcPD"]).sum()).reset_index(name="points_away")
-    points_pred = pd.merge(pred_home, pred_away, left_on="team1", right_on="team2", how="outer")
-    points_pred["team"] = points_pred["team1"].combine_first(points_pred["team2"])
-    points_pred["points_predicted"] = points_pred["points_home"].fillna(0) + points_pred["points_away"].fillna(0)
-    points_pred = points_pred[["team", "points_predicted"]]
-
-    # Actual goal difference so far
-    gd_actual = actual_gd.rename(columns={"gd": "gd_actual"})
-
-    # Predicted goal difference for unplayed matches
-    gd_pred_home = unplayed.groupby("team1").apply(lambda x: (x["xG1"] - x["xG2"]).sum()).reset_index(name="gd_home")
-    gd_pred_away = unplayed.groupby("team2").apply(lambda x: (x["xG2"] - x["xG1"]).sum()).reset_index(name="gd_away")
-    gd_pred = pd.merge(gd_pred_home, gd_pred_away, left_on="team1", right_on="team2", how="outer")
-    gd_pred["team"] = gd_pred["team1"].combine_first(gd_pred["team2"])
-    gd_pred["gd_predicted"] = gd_pred["gd_home"].fillna(0) + gd_pred["gd_away"].fillna(0)
-    gd_pred = gd_pred[["team", "gd_predicted"]]
-
-    # Combine actual + predicted
-    hybrid = pd.merge(points_actual, points_pred, on="team", how="outer").fillna(0)
-    hybrid = pd.merge(hybrid, gd_actual, on="team", how="outer").fillna(0)
-    hybrid = pd.merge(hybrid, gd_pred, on="team", how="outer").fillna(0)
-
-    hybrid["total_points"] = hybrid["points_actual"] + hybrid["points_predicted"]
-    hybrid["total_gd"] = hybrid["gd_actual"] + hybrid["gd_predicted"]
-
-    hybrid = hybrid.sort_values(by=["total_points", "total_gd"], ascending=False).reset_index(drop=True)
-    hybrid.index = hybrid.index + 1
-
     st.markdown("**Projected Final Table (Actual + Predicted)**")
     st.dataframe(hybrid[["team", "total_points", "total_gd"]].rename(columns={
         "total_points": "Points",
         "total_gd": "Goal Difference"
     }))
+
+# ---------- TAB 3 ----------
+with tab3:
+    st.subheader(f"Season Simulation — {full_division_name}, {selected_season}")
+    st.caption(f"{N_SIMS:,} simulations of the {len(unplayed)} remaining fixtures, drawn from forcPH/forcPD/forcPA with xG scorelines.")
+
+    position_probs, zone_probs = season_simulation(played, unplayed, selected_div)
+
+    st.markdown("**Zone Probabilities**")
+    st.dataframe(
+        zone_probs.style.format("{:.1%}", subset=zone_probs.columns.drop("Avg position"))
+        .format("{:.1f}", subset=["Avg position"])
+    )
+
+    st.markdown("**Finishing Position Probabilities**")
+    st.dataframe(
+        position_probs.style.background_gradient(cmap="Greens", axis=None).format("{:.0%}")
+    )
+
+# ---------- TAB 4 ----------
+with tab4:
+    st.subheader(f"Table Timeline — {full_division_name}, {selected_season}")
+
+    season_teams = tuple(sorted(set(df_filtered["team1"]) | set(df_filtered["team2"])))
+    timeline = season_timeline(selected_div, selected_season, season_teams)
+    timeline.update(played)
+
+    if len(timeline.dates) == 0:
+        st.info("No matches played yet.")
+    else:
+        match_dates = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in timeline.dates]
+        as_of = st.select_slider("Table as of", options=match_dates, value=match_dates[-1])
+        st.dataframe(timeline.table_at(as_of))
+
+        positions = timeline.positions().reset_index().melt(id_vars="date", var_name="team", value_name="position")
+        chart = alt.Chart(positions).mark_line(interpolate="step-after").encode(
+            x=alt.X("date:T", title="Date"),
+            y=alt.Y("position:Q", title="Position", scale=alt.Scale(reverse=True, domain=[1, len(season_teams)])),
+            color=alt.Color("team:N", legend=alt.Legend(columns=2)),
+            tooltip=["team", "date:T", "position"],
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+# ---------- TAB 5 ----------
+with tab5:
+    st.subheader(f"Fixture Importance — {full_division_name}, {selected_season}")
+
+    if unplayed.empty or not ZONES.get(selected_div):
+        st.info("No remaining fixtures or no promotion/relegation zones for this division.")
+    else:
+        st.caption(f"How much each remaining fixture's result moves every team's zone chances, "
+                   f"from the same {N_SIMS:,} simulations masked by that fixture's result. "
+                   f"Results seen in fewer than {MIN_RESULT_SIMS} simulations are left out.")
+        conditional, importance = fixture_importance(played, unplayed, selected_div)
+
+        st.dataframe(
+            importance.sort_values("Importance", ascending=False)
+            .style.format("{:.1%}", subset=["forcPH", "forcPD", "forcPA", "Importance"]),
+            hide_index=True,
+        )
+
+        labels = (importance["date"] + " — " + importance["team1"].astype(str) + " vs "
+                  + importance["team2"].astype(str)).tolist()
+        chosen = st.selectbox("Fixture", range(len(labels)), format_func=labels.__getitem__,
+                              index=int(importance["Importance"].idxmax()))
+        detail = conditional[(conditional["fixture"] == chosen) & (conditional["Swing"] >= 0.01)]
+        st.dataframe(
+            detail.drop(columns="fixture").sort_values("Swing", ascending=False)
+            .style.format("{:.1%}", subset=["Home win", "Draw", "Away win", "Swing"], na_rep="too rare"),
+            hide_index=True,
+        )
@@ -0,0 +1,121 @@
+"""Partitioned columnar store for all-eng-matches.csv.
+
+The CSV is split into one Arrow IPC file per div/season under
+all-eng-matches/div=<div>/season=<season>/matches.arrow, with team names stored
+as categoricals. Files are written uncompressed so they can be memory-mapped,
+and a manifest records a hash of each partition's source rows so that only
+partitions whose rows changed are rewritten.
+
+    python match_store.py [path/to/all-eng-matches.csv]
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pyarrow.feather as feather
+
+SOURCE_CSV = "all-eng-matches.csv"
+STORE_DIR = "all-eng-matches"
+MANIFEST = "manifest.json"
+PARTITION_KEYS = ["div", "season"]
+CATEGORICAL_COLS = ["team1", "team2", "division"]
+
+
+def _partition_dir(root: str, div, season) -> str:
+    return os.path.join(root, f"div={div}", f"season={season}")
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"mtime": st.st_mtime, "size": st.st_size}
+
+
+def _read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"source": None, "partitions": {}}
+
+
+def _scalar(value):
+    # numpy scalars from groupby keys -> plain Python values for the JSON manifest
+    return value.item() if hasattr(value, "item") else value
+
+
+def _rows_hash(rows: pd.DataFrame) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def build_store(csv_path: str = SOURCE_CSV, root: str = STORE_DIR) -> dict:
+    """Bring the store up to date with the CSV; return the manifest.
+
+    A no-op (one stat call) when the CSV is unchanged since the last build.
+    """
+    manifest = _read_manifest(root)
+    stamp = _source_stamp(csv_path)
+    if manifest["source"] == stamp:
+        return manifest
+
+    df = pd.read_csv(csv_path, parse_dates=["date"])
+    old = manifest["partitions"]
+    partitions = {}
+    for (div, season), rows in df.groupby(PARTITION_KEYS, sort=True):
+        div, season = _scalar(div), _scalar(season)
+        key = f"{div}/{season}"
+        digest = _rows_hash(rows)
+        partitions[key] = {"div": div, "season": season, "hash": digest, "rows": len(rows)}
+        if old.get(key, {}).get("hash") == digest:
+            continue
+
+        part = rows.drop(columns=PARTITION_KEYS).sort_values("date").reset_index(drop=True)
+        for col in CATEGORICAL_COLS:
+            if col in part.columns:
+                part[col] = part[col].astype("category")
+        path = _partition_dir(root, div, season)
+        os.makedirs(path, exist_ok=True)
+        feather.write_feather(part, os.path.join(path, "matches.arrow"), compression="uncompressed")
+
+    # Drop partitions that no longer exist in the source
+    for key, meta in old.items():
+        if key not in partitions:
+            shutil.rmtree(_partition_dir(root, meta["div"], meta["season"]), ignore_errors=True)
+
+    manifest = {"source": stamp, "partitions": partitions}
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def list_partitions(root: str = STORE_DIR) -> pd.DataFrame:
+    """div/season/rows for every partition, read from the manifest only."""
+    parts = _read_manifest(root)["partitions"].values()
+    return pd.DataFrame(list(parts), columns=["div", "season", "rows", "hash"])
+
+
+def load_partition(div, season, root: str = STORE_DIR) -> pd.DataFrame:
+    """Matches for one div/season, memory-mapped from disk."""
+    path = os.path.join(_partition_dir(root, div, season), "matches.arrow")
+    table = feather.read_table(path, memory_map=True)
+    df = table.to_pandas()
+    df.insert(0, "div", div)
+    df.insert(1, "season", season)
+    return df
+
+
+def load_all(root: str = STORE_DIR) -> pd.DataFrame:
+    """Every partition concatenated, for batch jobs that need the whole archive."""
+    parts = list_partitions(root)
+    return pd.concat(
+        [load_partition(p.div, p.season, root) for p in parts.itertuples()],
+        ignore_index=True,
+    )
+
+
+if __name__ == "__main__":
+    manifest = build_store(sys.argv[1] if len(sys.argv) > 1 else SOURCE_CSV)
+    print(f"{len(manifest['partitions'])} partitions in {STORE_DIR}/")
@@ -2,20 +2,38 @@ import streamlit as st
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
-from datetime import datetime
+import numpy as np
+import json
+from datetime import datetime, timezone
 
-# Load Google credentials from Streamlit secrets
-json_creds = st.secrets["google_service_account"]
+import oafc_history
+import player_names
+from submission_queue import GoogleSheetSink, SubmissionQueue
 
-# Define scope and credentials
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+# Number of form fields written per submission (the last is the player ID map); the queue's idempotency key follows them
+SUBMISSION_COLUMNS = 50
 
-creds = ServiceAccountCredentials.from_json_keyfile_dict(json_creds, scope)
+# Submissions land in a local durable queue and are flushed to the Google Sheet in the background
+@st.cache_resource
+def get_submission_queue():
+    # Load Google credentials from Streamlit secrets
+    json_creds = st.secrets["google_service_account"]
 
-client = gspread.authorize(creds)
+    # Define scope and credentials
+    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
 
-# Open the sheet by name or ID
-sheet = client.open_by_key("1NAXfRtRqvHda4uyKqdOTgxxSeEwKdLNyUKNl8A-owxQ").sheet1
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(json_creds, scope)
+
+    client = gspread.authorize(creds)
+
+    # Open the sheet by name or ID
+    sheet = client.open_by_key("1NAXfRtRqvHda4uyKqdOTgxxSeEwKdLNyUKNl8A-owxQ").sheet1
+
+    queue = SubmissionQueue()
+    queue.start_flusher(GoogleSheetSink(sheet, key_column=SUBMISSION_COLUMNS + 1))
+    return queue
+
+submission_queue = get_submission_queue()
 
 # --- Title and Introduction ---
 st.title("Latics Match Input Form")
@@ -40,31 +58,86 @@ Please select a match you know some information about and fill in as many detail
 All contributions will help build a detailed archive of Oldham Athletic's matches. Thank you!
 """)
 
-# Load your 5,000-match dataset
-matches_df = pd.read_csv("oafc-all-history-1907-08-on.csv")  # assume columns like: match_id, date, team_home, team_away
-
-# Load your player names from CSV
-player_df = pd.read_csv("oafc-player-names-1989-on.csv")  # Replace with actual filename
-player_names = sorted(player_df["x"].dropna().unique())
+# Load your 5,000-match dataset once per server, with labels and lookup indexes
+@st.cache_resource
+def load_match_catalogue(path: str = oafc_history.HISTORY_CSV):
+    # Typed snapshot: dates and seasons are already parsed, text fields are categoricals
+    matches = oafc_history.load_history(path)
+    matches["match_label"] = matches["Date"].astype(str) + " — Latics vs " + matches["opposition"].astype(str)
+
+    # label -> row position (first match wins, as the old boolean scan did)
+    labels = matches["match_label"]
+    label_index = dict(zip(labels[~labels.duplicated()], np.flatnonzero(~labels.duplicated())))
+
+    # opposition -> that club's match labels, in file (date) order
+    label_values = labels.to_numpy()
+    by_opposition = {opp: label_values[idx].tolist() for opp, idx in matches.groupby("opposition", observed=True).indices.items()}
+    return matches, label_index, by_opposition
+
+matches_df, match_label_index, matches_by_opposition = load_match_catalogue()
+
+# Trigram index over every known player name, plus each season's squad from the grids
+@st.cache_resource
+def load_player_index():
+    return player_names.build_index(), player_names.season_squads()
+
+player_index, squads = load_player_index()
+
+# Line-up slots in submission order: (key, label); each scorer is followed by a goal time
+PLAYER_SLOTS = (
+    [(f"oafc_no{i}", f"Latics No.{i}") for i in range(1, 12)]
+    + [(f"oafc_usedsub{i}", f"Latics Used substitute {i}") for i in range(1, 6)]
+    + [("oafc_unusedsubs", "Latics Unused subs (list all if possible)")]
+    + [(f"oafc_scorer{i}", f"Latics goalscorer {i}") for i in range(1, 12)]
+)
 
-# Custom function: allow autocomplete-like dropdown with fallback
-def player_input(label, key):
-    selected = st.selectbox(
-        f"Start typing to search for {label} (or type your own in the box below):",
-        options=[""] + player_names,
-        index=0,
-        key=f"{key}_selectbox"
-    )
+# Dropdown of the match's season squad (when we have one) with a free-text fallback
+def player_input(label, key, squad):
+    selected = ""
+    if squad:
+        selected = st.selectbox(
+            f"Select {label} from that season's squad (or type your own in the box below):",
+            options=[""] + squad,
+            index=0,
+            key=f"{key}_selectbox"
+        )
     if selected == "":
-        return st.text_input(f"Enter {label} manually instead:", key=f"{key}_text")
-    else:
-        return selected
-
-# Create a searchable dropdown
-matches_df['match_label'] = matches_df.apply(
-    lambda row: f"{row['Date']} — Latics vs {row['opposition']}", axis=1
+        selected = st.text_input(f"Enter {label}:" if not squad else f"Enter {label} manually instead:", key=f"{key}_text")
+    return selected
+
+# Free-text names are mapped to canonical player IDs at submission time
+def canonicalise(text):
+    """Each name in an entry (comma-separated for unused subs) as typed, with its canonical ID and spelling."""
+    resolved = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = player_index.canonical(part)
+        resolved.append({"entered": part, "id": match[0] if match else None, "name": match[1] if match else None})
+    return resolved
+
+with st.expander("Check a player's name"):
+    lookup = st.text_input("Start typing a name", key="name_lookup")
+    if lookup:
+        st.dataframe(player_index.search(lookup), hide_index=True)
+
+# Narrow by opposition first, then pick the match
+selected_opposition = st.selectbox(
+    "Search and select an opponent:",
+    sorted(matches_by_opposition),
+    index=None,
+    placeholder="Start typing a club name"
 )
-selected_match = st.selectbox("Search and select a match:", matches_df['match_label'])
+selected_match = st.selectbox(
+    "Select a match:",
+    matches_by_opposition.get(selected_opposition, []),
+    index=None,
+    placeholder="Choose an opponent first" if selected_opposition is None else "Select a date"
+)
+
+match_season = None if selected_match is None else matches_df.at[match_label_index[selected_match], "season"]
+match_squad = squads.get(match_season, []) if pd.notna(match_season) else []
 
 # Form for input
 with st.form("input_form"):
@@ -82,46 +155,13 @@ with st.form("input_form"):
         ]
     )
 
-    # who was in the lineup?
-    oafc_no1 = player_input("Latics No.1","oafc_no1")
-    oafc_no2 = player_input("Latics No.2","oafc_no2")
-    oafc_no3 = player_input("Latics No.3","oafc_no3")
-    oafc_no4 = player_input("Latics No.4","oafc_no4")
-    oafc_no5 = player_input("Latics No.5","oafc_no5")
-    oafc_no6 = player_input("Latics No.6","oafc_no6")
-    oafc_no7 = player_input("Latics No.7","oafc_no7")
-    oafc_no8 = player_input("Latics No.8","oafc_no8")
-    oafc_no9 = player_input("Latics No.9","oafc_no9")
-    oafc_no10 = player_input("Latics No.10","oafc_no10")
-    oafc_no11 = player_input("Latics No.11","oafc_no11")
-    oafc_usedsub1 = player_input("Latics Used substitute 1","oafc_usedsub1")
-    oafc_usedsub2 = player_input("Latics Used substitute 2","oafc_usedsub2")
-    oafc_usedsub3 = player_input("Latics Used substitute 3","oafc_usedsub3")
-    oafc_usedsub4 = player_input("Latics Used substitute 4","oafc_usedsub4")
-    oafc_usedsub5 = player_input("Latics Used substitute 5","oafc_usedsub5")
-    oafc_unusedsubs = player_input("Latics Unused subs (list all if possible)","oafc_unusedsubs")
-    oafc_scorer1 = player_input("Latics goalscorer 1","oafc_scorer1")
-    oafc_goaltime1 = st.text_input("Latics goal time 1")
-    oafc_scorer2 = player_input("Latics goalscorer 2","oafc_scorer2")
-    oafc_goaltime2 = st.text_input("Latics goal time 2")
-    oafc_scorer3 = player_input("Latics goalscorer 3","oafc_scorer3")
-    oafc_goaltime3 = st.text_input("Latics goal time 3")
-    oafc_scorer4 = player_input("Latics goalscorer 4","oafc_scorer4")
-    oafc_goaltime4 = st.text_input("Latics goal time 4")
-    oafc_scorer5 = player_input("Latics goalscorer 5","oafc_scorer5")
-    oafc_goaltime5 = st.text_input("Latics goal time 5")
-    oafc_scorer6 = player_input("Latics goalscorer 6","oafc_scorer6")
-    oafc_goaltime6 = st.text_input("Latics goal time 6")
-    oafc_scorer7 = player_input("Latics goalscorer 7","oafc_scorer7")
-    oafc_goaltime7 = st.text_input("Latics goal time 7")
-    oafc_scorer8 = player_input("Latics goalscorer 8","oafc_scorer8")
-    oafc_goaltime8 = st.text_input("Latics goal time 8")
-    oafc_scorer9 = player_input("Latics goalscorer 9","oafc_scorer9")
-    oafc_goaltime9 = st.text_input("Latics goal time 9")
-    oafc_scorer10 = player_input("Latics goalscorer 10","oafc_scorer10")
-    oafc_goaltime10 = st.text_input("Latics goal time 10")
-    oafc_scorer11 = player_input("Latics goalscorer 11","oafc_scorer11")
-    oafc_goaltime11 = st.text_input("Latics goal time 11")
+    # who was in the lineup? Entries are kept in submission column order
+    entries = {}
+    for key, label in PLAYER_SLOTS:
+        entries[key] = player_input(label, key, match_squad)
+        if key.startswith("oafc_scorer"):
+            n = key.removeprefix("oafc_scorer")
+            entries[f"oafc_goaltime{n}"] = st.text_input(f"Latics goal time {n}")
     # Kit colours
     oafc_colour = st.selectbox(
         "OAFC kit colour",
@@ -143,13 +183,17 @@ with st.form("input_form"):
     author = st.text_area("Your name (if you want credit, otherwise leave blank)")
     submit = st.form_submit_button("Submit")
 
-    if submit:
+    if submit and selected_match is None:
+        st.error("Please select a match before submitting.")
+    elif submit:
         # Extract match info
         # match_id = matches_df[matches_df['match_label'] == selected_match]['match_id'].values[0]
-        match_row = matches_df[matches_df['match_label'] == selected_match].iloc[0]
+        match_row = matches_df.iloc[match_label_index[selected_match]]
+        # The sheet keeps what was typed; the resolved IDs go alongside so a wrong match can be spotted
+        player_ids = {key: ids for key, _ in PLAYER_SLOTS if (ids := canonicalise(entries[key]))}
         # NEW - writing to Google Sheet
         row_values = [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            datetime.now(timezone.utc).isoformat(sep=" ", timespec="seconds"),
             selected_match,
             performance,
             total_attendance,
@@ -157,47 +201,10 @@ with st.form("input_form"):
             away_fan_location,
             oafc_colour,
             opp_colour,
-            oafc_no1,
-            oafc_no2,
-            oafc_no3,
-            oafc_no4,
-            oafc_no5,
-            oafc_no6,
-            oafc_no7,
-            oafc_no8,
-            oafc_no9,
-            oafc_no10,
-            oafc_no11,
-            oafc_usedsub1,
-            oafc_usedsub2,
-            oafc_usedsub3,
-            oafc_usedsub4,
-            oafc_usedsub5,
-            oafc_unusedsubs,
-            oafc_scorer1,
-            oafc_goaltime1,
-            oafc_scorer2,
-            oafc_goaltime2,
-            oafc_scorer3,
-            oafc_goaltime3,
-            oafc_scorer4,
-            oafc_goaltime4,
-            oafc_scorer5,
-            oafc_goaltime5,
-            oafc_scorer6,
-            oafc_goaltime6,
-            oafc_scorer7,
-            oafc_goaltime7,
-            oafc_scorer8,
-            oafc_goaltime8,
-            oafc_scorer9,
-            oafc_goaltime9,
-            oafc_scorer10,
-            oafc_goaltime10,
-            oafc_scorer11,
-            oafc_goaltime11,
+            *entries.values(),
             notes,
-            author
+            author,
+            json.dumps(player_ids)
         ]
-        sheet.append_row(row_values)
+        submission_queue.enqueue(row_values)
         st.success("Submission received. Thank you!")
@@ -0,0 +1,70 @@
+import os
+
+import streamlit as st
+
+import oafc_cube
+import oafc_records
+
+st.set_page_config(page_title="Oldham Athletic Records", layout="wide")
+st.title("Oldham Athletic Records")
+
+# ---------- Load engine ----------
+@st.cache_resource
+def load_engine() -> oafc_records.RecordsEngine:
+    return oafc_records.RecordsEngine(oafc_records.load_results())
+
+@st.cache_data
+def history_mtime(mtime: float) -> float:
+    # New results are appended to the cached engine; edits to older ones rebuild it
+    load_engine().refresh(oafc_records.load_results())
+    return mtime
+
+@st.cache_data
+def load_cube(mtime: float):
+    # Only matches added since the stored cube are aggregated
+    return oafc_cube.build_cube()
+
+engine = load_engine()
+history_mtime(os.path.getmtime(oafc_records.HISTORY_CSV))
+cube = load_cube(os.path.getmtime(oafc_records.HISTORY_CSV))
+
+tab1, tab2, tab3, tab4 = st.tabs(["🤝 Head-to-head", "📈 Streaks", "💥 Biggest wins", "📊 Aggregates"])
+
+# ---------- Head-to-head ----------
+with tab1:
+    opposition = st.selectbox("Opposition", engine.oppositions())
+    summary, matches = engine.head_to_head(opposition)
+    cols = st.columns(len(summary))
+    for col, (label, value) in zip(cols, summary.items()):
+        col.metric(label.replace("_", " ").title(), value)
+    st.dataframe(matches.iloc[::-1], hide_index=True, use_container_width=True)
+
+# ---------- Streaks ----------
+with tab2:
+    current = engine.current_streaks()
+    st.caption("Current runs: " + ", ".join(f"{kind} {n}" for kind, n in current.items() if n))
+    kind = st.radio("Streak", oafc_records.STREAKS, horizontal=True)
+    st.dataframe(engine.longest_streaks(kind, 20), hide_index=True, use_container_width=True)
+
+# ---------- Biggest wins ----------
+with tab3:
+    by = st.radio("By", ["all"] + oafc_records.WIN_DIMENSIONS, horizontal=True)
+    value = None
+    if by != "all":
+        values = sorted({v for (dim, v) in engine.wins if dim == by}, reverse=by == "season")
+        value = st.selectbox(by.title(), values)
+    st.dataframe(engine.biggest_wins(by, value, 20), hide_index=True, use_container_width=True)
+
+# ---------- Aggregates ----------
+with tab4:
+    group_by = st.multiselect("Group by", oafc_cube.DIMENSIONS, default=["season"])
+    filters = {}
+    cols = st.columns(3)
+    for col, dim in zip(cols, ["venue", "division", "manager"]):
+        chosen = col.multiselect(dim.title(), sorted(cube[dim].dropna().unique()))
+        if chosen:
+            filters[dim] = chosen
+    table = oafc_cube.rollup(cube, group_by, **filters)
+    shown = group_by + ["played", "won", "drawn", "lost", "win_pct", "ppg", "gf_pg", "ga_pg",
+                  "avg_attendance", "avg_away_attendance", "avg_receipts"]
+    st.dataframe(table[shown], hide_index=True, use_container_width=True)
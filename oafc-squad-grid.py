@@ -1,8 +1,13 @@
 import re
+import numpy as np
 import pandas as pd
 import streamlit as st
 import glob
 import os
+from functools import lru_cache
+
+import squad_events
+from squad_events import get_player_cols
 
 # Detect all available squad-grid files
 files = glob.glob("squad-grid-*.csv")
@@ -17,19 +22,27 @@ file_path = f"squad-grid-{selected_year}.csv"
 st.set_page_config(page_title=f"Oldham Athletic Squad Grid (season beginning {selected_year})", layout="wide")
 
 # ---------- Load data ----------
-df = pd.read_csv(file_path)
+@st.cache_data
+def load_grid(path: str, mtime: float) -> pd.DataFrame:
+    return pd.read_csv(path)
 
-# ---------- Identify player columns (skip metadata/referee/etc.) ----------
-META_COLS_KNOWN = {
-    "unnamed: 0","date","opposition","goals1","goals2","venue","kickoff",
-    "attendance","awayatt","post.position","opp.post.position","referee",
-    "result","notes","competition","round"
-}
-def get_player_cols(df_: pd.DataFrame):
-    meta_present = {c for c in df_.columns if c.lower() in META_COLS_KNOWN}
-    with_space = [c for c in df_.columns if (" " in c and c not in meta_present)]
-    return with_space if with_space else [c for c in df_.columns if c not in meta_present]
+df = load_grid(file_path, os.path.getmtime(file_path))
+
+# ---------- Long-format events for every season ----------
+@st.cache_resource
+def load_event_store(manifest: str) -> squad_events.EventStore:
+    return squad_events.EventStore()
 
+@st.cache_data
+def load_minutes(manifest: str) -> pd.DataFrame:
+    # One batch over every season in the store
+    return squad_events.minutes_played(load_event_store(manifest).events)
+
+# Re-parses only seasons whose grid changed; the store reloads when the manifest does
+event_manifest = repr(squad_events.build_store())
+store = load_event_store(event_manifest)
+
+# ---------- Identify player columns (skip metadata/referee/etc.) ----------
 player_cols = get_player_cols(df)
 
 # ---------- Event patterns ----------
@@ -51,107 +64,159 @@ BG_SUB_ON = "#D9EDF7"  # light blue
 BG_SUB_OFF= "#FCF8E3"  # pale yellow
 BG_UNUSED = "#E6E6E6"  # light grey
 
-def format_cell(raw) -> tuple[str, str]:
-    """Return (display_text, background_colour) for a player's cell."""
-    if raw is None:
-        return "", ""
-    s = str(raw).strip().lower()
-    if not s or s == "nan":
-        return "", ""
-
-    # Determine background
-    unused   = bool(re.search(r'\buu\b', s))
-    sub_on_m = re.search(r'\bsub\s*\d*\s*on\s*(\d+)', s)
-    off_m    = re.search(r'(\d+)\s*off', s)
-    started  = bool(re.search(r'\bx\b', s))
-
-    if unused:
-        bg = BG_UNUSED
-    elif sub_on_m:
-        bg = BG_SUB_ON
-    elif off_m:
-        bg = BG_SUB_OFF
-    elif started:
-        bg = BG_START
-    else:
-        bg = ""
+# Background classification: one scan picks up every role marker in the cell
+ROLE_RE = re.compile(r"\b(?P<unused>uu)\b|\b(?P<sub_on>sub)\s*\d*\s*on\s*\d+|\d+\s*(?P<sub_off>off)|\b(?P<start>x)\b")
+DIGITS_RE = re.compile(r"\d+")
+# Role categories (highest priority first) and their background colours
+ROLES = ["unused", "sub_on", "sub_off", "start", ""]
+ROLE_COLOURS = np.array([BG_UNUSED, BG_SUB_ON, BG_SUB_OFF, BG_START, ""], dtype=object)
+NO_ROLE = ROLES.index("")
+
+@lru_cache(maxsize=4096)
+def parse_event_string(s: str) -> tuple[str, int]:
+    """(display_text, role code into ROLES) for a normalised (stripped, lower-case) cell string."""
+    found = {m.lastgroup for m in ROLE_RE.finditer(s)}
+    role = next((i for i, r in enumerate(ROLES) if r in found), NO_ROLE)
+
+    # Unused overrides display entirely
+    if "unused" in found:
+        return "🚫", role
 
     # Tokenise and parse events in order
     tokens = s.split()
+    n = len(tokens)
     parts = []
     i = 0
-    while i < len(tokens):
+    while i < n:
         t = tokens[i]
+        nxt = tokens[i+1] if i + 1 < n else None
 
         if t == "x":
             parts.append("🟩")
             i += 1
-        elif t == "sub" and i + 2 < len(tokens) and tokens[i+2] == "on":
-            parts.append(f"🔺 {tokens[i+1]}")
+        elif t == "sub" and i + 2 < n and tokens[i+2] == "on":
+            parts.append(f"🔺 {nxt}")
             i += 3
-        elif re.fullmatch(r"\d+", t) and i + 1 < len(tokens) and tokens[i+1] == "off":
+        elif nxt == "off" and DIGITS_RE.fullmatch(t):
             parts.append(f"🔻 {t}")
             i += 2
-        elif t == "g" and i + 1 < len(tokens):
-            parts.append(f"⚽ {tokens[i+1]}")
+        elif t == "g" and nxt is not None:
+            parts.append(f"⚽ {nxt}")
             i += 2
-        elif t == "pen" and i + 1 < len(tokens):
-            parts.append(f"🟢⚽ {tokens[i+1]}")
+        elif t == "pen" and nxt is not None:
+            parts.append(f"🟢⚽ {nxt}")
             i += 2
-        elif t == "og" and i + 1 < len(tokens):
-            parts.append(f"🔴⚽ {tokens[i+1]}")
+        elif t == "og" and nxt is not None:
+            parts.append(f"🔴⚽ {nxt}")
             i += 2
-        elif t == "y":
-            if i + 1 < len(tokens) and tokens[i+1].isdigit():
-                parts.append(f"🟨 {tokens[i+1]}")
+        elif t in ("y", "r"):
+            card = "🟨" if t == "y" else "🟥"
+            if nxt is not None and nxt.isdigit():
+                parts.append(f"{card} {nxt}")
                 i += 2
             else:
-                parts.append("🟨")
-                i += 1
-        elif t == "r":
-            if i + 1 < len(tokens) and tokens[i+1].isdigit():
-                parts.append(f"🟥 {tokens[i+1]}")
-                i += 2
-            else:
-                parts.append("🟥")
+                parts.append(card)
                 i += 1
         elif t == "uu":
             parts.append("🚫")
             i += 1
-        elif re.fullmatch(r"\d+", t):
+        elif DIGITS_RE.fullmatch(t):
             # A bare minute after another event type = goal
             parts.append(f"⚽ {t}")
             i += 1
         else:
             i += 1
 
-    # Unused overrides display entirely
-    if unused:
-        parts = ["🚫"]
+    return " ".join(parts).strip(), role
 
-    return " ".join(parts).strip(), bg
+def parse_cell(raw) -> tuple[str, int]:
+    """Return (display_text, role code) for a player's cell."""
+    if raw is None:
+        return "", NO_ROLE
+    s = str(raw).strip().lower()
+    if not s or s == "nan":
+        return "", NO_ROLE
+    return parse_event_string(s)
+
+def parse_grid(df_: pd.DataFrame, cols: list[str]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Display text and categorical role frames for `cols`, parsing each distinct cell string once."""
+    values = df_[cols].to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values.ravel())
+    # Missing cells get code -1, which picks up the trailing ("", NO_ROLE) entry
+    parsed = [parse_cell(v) for v in uniques] + [("", NO_ROLE)]
+    display = np.array([p[0] for p in parsed], dtype=object)[codes].reshape(values.shape)
+    roles = np.array([p[1] for p in parsed], dtype=np.int8)[codes].reshape(values.shape)
+    return (
+        pd.DataFrame(display, index=df_.index, columns=cols),
+        pd.DataFrame({c: pd.Categorical.from_codes(roles[:, j], ROLES) for j, c in enumerate(cols)}, index=df_.index),
+    )
 
-# ---------- Build display DF + background map ----------
-df_display = df.copy()
-bg_map: dict[tuple[int, str], str] = {}
+def role_lookup(roles: pd.DataFrame, lookup) -> np.ndarray:
+    """Map a categorical role frame through a per-role array (colours, CSS classes, ...)."""
+    codes = np.column_stack([roles[c].cat.codes.to_numpy() for c in roles.columns])
+    return np.asarray(lookup, dtype=object)[codes]
 
-for col in player_cols:
-    for i, val in df[col].items():
-        disp, bg = format_cell(val)
-        df_display.at[i, col] = disp
-        if bg:
-            bg_map[(i, col)] = bg
+# ---------- Build display DF + role frame ----------
+def build_display(df_: pd.DataFrame, cols: list[str]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    disp_df, roles = parse_grid(df_, cols)
+    out = df_.copy()
+    out[cols] = disp_df
+    return out.astype(str), roles
 
-df_display = df_display.astype(str)
+@st.cache_data
+def load_display(path: str, mtime: float) -> tuple[pd.DataFrame, pd.DataFrame]:
+    season_df = load_grid(path, mtime)
+    return build_display(season_df, get_player_cols(season_df))
 
 # ---------- Style for Streamlit ----------
-def col_bg_styler(col: pd.Series):
-    return [f"background-color: {bg_map.get((i, col.name), '')}" for i in col.index]
+# One CSS rule per role colour; cells only carry a class name
+ROLE_CLASSES = [f"role-{r}" if r else "" for r in ROLES]
+GRID_CSS = "<style>" + "".join(
+    f".squad-grid td.{cls} {{ background-color: {colour}; }}"
+    for cls, colour in zip(ROLE_CLASSES, ROLE_COLOURS) if cls
+) + ".squad-grid table { border-collapse: collapse; font-size: 0.8rem; white-space: nowrap; }" \
+    ".squad-grid th, .squad-grid td { border: 1px solid #ddd; padding: 2px 6px; }</style>"
 
-styled = df_display.style.apply(col_bg_styler, axis=0, subset=player_cols)
+@st.cache_data
+def render_grid_html(path: str, mtime: float) -> str:
+    """Styled HTML for one season's grid, rendered once per file version."""
+    from pandas.io.formats.style import Styler
+
+    disp, roles = load_display(path, mtime)
+    classes = pd.DataFrame(role_lookup(roles, ROLE_CLASSES), index=roles.index, columns=roles.columns)
+    html = Styler(disp, cell_ids=False).set_td_classes(classes).to_html()
+    return f'{GRID_CSS}<div class="squad-grid" style="overflow:auto; max-height:700px">{html}</div>'
+
+df_display, roles_df = load_display(file_path, os.path.getmtime(file_path))
 
 st.title("Oldham Athletic — Season Grid (emojis + role backgrounds)")
-st.dataframe(styled, use_container_width=True)
+st.html(render_grid_html(file_path, os.path.getmtime(file_path)))
+
+# ---------- Minutes played ----------
+with st.expander("Minutes played"):
+    minutes = load_minutes(event_manifest)
+    season_mins = minutes[minutes["season"] == int(selected_year)]
+    heat = (
+        season_mins.pivot(index="match", columns="player", values="minutes")
+        .reindex(index=range(1, len(df) + 1), columns=player_cols)
+    )
+    heat.insert(0, "opposition", df["opposition"].to_numpy())
+    st.dataframe(
+        heat.style.background_gradient(cmap="Greens", vmin=0, vmax=squad_events.MATCH_MINUTES, subset=player_cols)
+        .format(precision=0, na_rep=""),
+        use_container_width=True,
+    )
+    totals = squad_events.season_minutes(minutes)
+    st.dataframe(
+        totals[totals["season"] == int(selected_year)].drop(columns="season").sort_values("minutes", ascending=False),
+        hide_index=True, use_container_width=True,
+    )
+
+# ---------- Player careers ----------
+with st.expander("Player career (all seasons)"):
+    career_player = st.selectbox("Player", store.players,
+                                 index=store.players.index(player_cols[0]) if player_cols and player_cols[0] in store.players else 0)
+    st.dataframe(store.career(career_player), use_container_width=True)
 
 # ---------- Legend ----------
 legend_items = [
@@ -170,42 +235,68 @@ st.markdown("### Legend")
 st.markdown("```\n" + legend_text + "\n```")
 
 # ---------- Excel export ----------
-def export_excel_with_bg_and_legend(df_disp: pd.DataFrame, bg_lookup: dict, filename: str = "squad_grid.xlsx"):
-    from openpyxl import Workbook
-    from openpyxl.styles import PatternFill
-    wb = Workbook()
-    ws = wb.active
-
-    # headers
-    for j, col in enumerate(df_disp.columns, start=1):
-        ws.cell(row=1, column=j, value=col)
-
-    # body
-    for i in range(len(df_disp)):
-        for j, col in enumerate(df_disp.columns, start=1):
-            val = df_disp.iloc[i, j-1]
-            cell = ws.cell(row=i+2, column=j, value=val)
-            bg = bg_lookup.get((i, col))
-            if bg:
-                hex6 = bg.replace("#", "")
-                cell.fill = PatternFill(start_color=hex6, end_color=hex6, fill_type="solid")
-
-    # legend after table
-    legend_start_row = len(df_disp) + 4
-    ws.cell(row=legend_start_row, column=1, value="Legend:")
-    for idx, item in enumerate(legend_items, start=legend_start_row + 1):
-        ws.cell(row=idx, column=1, value=item)
-
-    return wb
-
-if st.button("📥 Export to Excel"):
+def export_excel_with_bg_and_legend(sheets) -> bytes:
+    """Stream (title, display_df, roles_df) sheets into a write-only workbook and return the .xlsx bytes."""
     from io import BytesIO
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import NamedStyle, PatternFill
+
+    wb = Workbook(write_only=True)
+    styles: dict[str, str] = {}  # one named style per background colour, shared across sheets
+
+    def styled_cell(ws, val, bg):
+        if bg not in styles:
+            hex6 = bg.replace("#", "")
+            wb.add_named_style(NamedStyle(name=f"bg_{hex6}", fill=PatternFill(start_color=hex6, end_color=hex6, fill_type="solid")))
+            styles[bg] = f"bg_{hex6}"
+        cell = WriteOnlyCell(ws, value=val)
+        cell.style = styles[bg]
+        return cell
+
+    for title, df_disp, roles in sheets:
+        ws = wb.create_sheet(title)
+        ws.append(list(df_disp.columns))
+
+        # body
+        colours = (
+            pd.DataFrame(role_lookup(roles, ROLE_COLOURS), columns=roles.columns)
+            .reindex(columns=df_disp.columns).fillna("").to_numpy(dtype=object)
+        )
+        for values, bgs in zip(df_disp.to_numpy(dtype=object), colours):
+            ws.append([styled_cell(ws, val, bg) if bg else val for val, bg in zip(values, bgs)])
+
+        # legend after table
+        ws.append([])
+        ws.append([])
+        ws.append(["Legend:"])
+        for item in legend_items:
+            ws.append([item])
+
     bio = BytesIO()
-    wb = export_excel_with_bg_and_legend(df_display, bg_map)
     wb.save(bio)
+    return bio.getvalue()
+
+def all_season_sheets():
+    # One season in memory at a time
+    for year in sorted(years):
+        path = f"squad-grid-{year}.csv"
+        yield (year, *load_display(path, os.path.getmtime(path)))
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+col_export, col_export_all = st.columns(2)
+if col_export.button("📥 Export to Excel"):
     st.download_button(
         "Download .xlsx",
-        data=bio.getvalue(),
+        data=export_excel_with_bg_and_legend([(selected_year, df_display, roles_df)]),
         file_name="squad_grid.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        mime=XLSX_MIME
+    )
+if col_export_all.button("📥 Export all seasons to Excel"):
+    st.download_button(
+        "Download all seasons .xlsx",
+        data=export_excel_with_bg_and_legend(all_season_sheets()),
+        file_name="squad_grid_all_seasons.xlsx",
+        mime=XLSX_MIME
     )
@@ -0,0 +1,138 @@
+"""Materialised aggregate cube over Oldham's played matches.
+
+One cell per season x division x venue x manager x opposition holds additive
+measures only (match and result counts, goals, and sums with non-missing
+counts for attendance, away attendance and gate receipts), built in one
+grouped pass. Any roll-up or slice is a groupby-sum over cells, with averages
+derived afterwards, so the raw rows are never touched at query time.
+
+The cube is stored in oafc-cube/cube.arrow. Its manifest records how many
+(date-ordered) played matches it covers and a hash of them: when the history
+only gains later matches, just those are aggregated and added to the cells;
+any other edit rebuilds the cube.
+
+    python oafc_cube.py [dimension ...]
+"""
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import oafc_history
+
+CUBE_DIR = "oafc-cube"
+CUBE = "cube.arrow"
+MANIFEST = "manifest.json"
+DIMENSIONS = ["season", "division", "venue", "manager", "opposition"]
+# Source column -> measure prefix; each gets a sum and a count of matches with a value
+VALUE_MEASURES = {"attendance": "attendance", "awayatt": "away_attendance", "Gate Receipts": "receipts"}
+# Points are 3 for a win across every era, so points per game compares managers like for like
+POINTS = {"W": 3, "D": 1, "L": 0}
+
+
+def _rows_hash(rows: pd.DataFrame) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def _read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"rows": 0, "hash": None}
+
+
+def _cube_source(played: pd.DataFrame) -> pd.DataFrame:
+    """The columns the cube is built from, with dimension names applied."""
+    return played.rename(columns={"Manager": "manager"})[DIMENSIONS + ["result", "gf", "ga", *VALUE_MEASURES]]
+
+
+def aggregate(rows: pd.DataFrame) -> pd.DataFrame:
+    """Cells (one per dimension combination present) for a set of source rows."""
+    result = rows["result"].to_numpy()
+    measures = pd.DataFrame({
+        "played": 1,
+        "won": (result == "W").astype(int),
+        "drawn": (result == "D").astype(int),
+        "lost": (result == "L").astype(int),
+        "points": pd.Series(result).map(POINTS).to_numpy(),
+        "gf": rows["gf"].to_numpy(),
+        "ga": rows["ga"].to_numpy(),
+    }, index=rows.index)
+    for col, name in VALUE_MEASURES.items():
+        values = rows[col].astype("Float64")
+        measures[f"{name}_sum"] = values.fillna(0).to_numpy(float)
+        measures[f"{name}_n"] = values.notna().to_numpy(int)
+    keys = [rows[d] for d in DIMENSIONS]
+    return measures.groupby(keys, observed=True, dropna=False).sum().reset_index()
+
+
+def _categorise(cells: pd.DataFrame) -> pd.DataFrame:
+    # Concatenating cells whose categories differ gives plain strings; restore categoricals
+    return cells.astype({d: "category" for d in DIMENSIONS if d != "season"})
+
+
+def _combine(cells: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Add new cells into existing ones (summing where the dimensions coincide)."""
+    merged = pd.concat([cells, new], ignore_index=True)
+    return _categorise(merged.groupby(DIMENSIONS, observed=True, dropna=False).sum().reset_index())
+
+
+def build_cube(csv_path: str = oafc_history.HISTORY_CSV, root: str = CUBE_DIR) -> pd.DataFrame:
+    """Bring the stored cube up to date with the history; returns its cells."""
+    source = _cube_source(oafc_history.played_matches(oafc_history.load_history(csv_path)))
+    manifest = _read_manifest(root)
+    path = os.path.join(root, CUBE)
+    n = manifest["rows"]
+
+    prefix_ok = os.path.exists(path) and len(source) >= n and _rows_hash(source.iloc[:n]) == manifest["hash"]
+    if prefix_ok and len(source) == n:
+        return feather.read_feather(path)
+    if prefix_ok:
+        cells = _combine(feather.read_feather(path), aggregate(source.iloc[n:]))
+    else:
+        cells = _categorise(aggregate(source))
+
+    os.makedirs(root, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(cells, tmp)
+    os.replace(tmp, path)
+    with open(os.path.join(root, MANIFEST), "w") as f:
+        json.dump({"rows": len(source), "hash": _rows_hash(source)}, f, indent=1)
+    return cells
+
+
+def rollup(cells: pd.DataFrame, by: list[str], **where) -> pd.DataFrame:
+    """Sum cells to the `by` dimensions after slicing on `where` (dimension=value or list of values).
+
+    Adds per-game and average columns: win %, points per game, goals for/against
+    per game, and average attendance, away attendance and gate receipts over the
+    matches that have them.
+    """
+    mask = np.ones(len(cells), dtype=bool)
+    for dim, value in where.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= cells[dim].isin(values).to_numpy()
+    picked = cells[mask]
+    measures = picked.drop(columns=DIMENSIONS)
+    totals = measures.groupby([picked[d] for d in by], observed=True).sum() if by else measures.sum().to_frame().T
+
+    totals["win_pct"] = (100 * totals["won"] / totals["played"]).round(1)
+    totals["ppg"] = (totals["points"] / totals["played"]).round(2)
+    totals["gf_pg"] = (totals["gf"] / totals["played"]).round(2)
+    totals["ga_pg"] = (totals["ga"] / totals["played"]).round(2)
+    for name in VALUE_MEASURES.values():
+        with np.errstate(invalid="ignore", divide="ignore"):
+            totals[f"avg_{name}"] = (totals[f"{name}_sum"] / totals[f"{name}_n"].replace(0, np.nan)).round(1)
+    return totals.reset_index() if by else totals
+
+
+if __name__ == "__main__":
+    cells = build_cube()
+    by = sys.argv[1:] or ["manager"]
+    print(f"{len(cells)} cells")
+    print(rollup(cells, by)[by + ["played", "win_pct", "ppg", "avg_attendance"]].to_string(index=False))
@@ -0,0 +1,124 @@
+"""Typed loader for oafc-all-history-1907-08-on.csv with a binary snapshot.
+
+The CSV is parsed against a declared schema: counts (attendance, away
+attendance, season tickets, members) become nullable integers, money columns
+nullable floats (pre-decimal receipts have fractional pounds), low-cardinality
+text columns categoricals. Dates are parsed once into `date` (the raw `Date`
+text is kept, as match labels are built from it) with the season beginning
+in July.
+
+The typed table is written uncompressed to oafc-history/history.arrow, so it
+can be memory-mapped, and only rebuilt when the CSV's mtime/size or the schema
+changes.
+
+    python oafc_history.py
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+HISTORY_CSV = "oafc-all-history-1907-08-on.csv"
+SNAPSHOT_DIR = "oafc-history"
+SNAPSHOT = "history.arrow"
+MANIFEST = "manifest.json"
+
+# Bump when the schema or derived columns change, so old snapshots are rebuilt
+SCHEMA_VERSION = 1
+SCHEMA = {
+    "Unnamed: 0": "Int64",
+    "opposition": "category",
+    # Scores also hold "P" (postponed) and "A" (abandoned)
+    "goals1": "category",
+    "goals2": "category",
+    "division": "category",
+    "venue": "category",
+    "Date": "str",
+    "Kickoff": "category",
+    "attendance": "Int64",
+    "awayatt": "Int64",
+    "Season Tickets": "Int64",
+    "Manager": "category",
+    "ShootingH1": "category",
+    "Colour": "category",
+    "Opp.Colour": "category",
+    "Youtube.link": "str",
+    "Home.end.location": "category",
+    "Lookers.stand.status": "category",
+    "Gate Receipts": "Float64",
+    "Away.fan.location": "category",
+    "members": "Int64",
+    "tax": "Float64",
+    "revenue.sharing.20pc": "Float64",
+    "three.pc": "Float64",
+    "police": "Float64",
+}
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"mtime": st.st_mtime, "size": st.st_size, "schema": SCHEMA_VERSION}
+
+
+def _read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"source": None}
+
+
+def read_csv(csv_path: str = HISTORY_CSV) -> pd.DataFrame:
+    """Parse the CSV against SCHEMA and add `date` and `season`."""
+    # Numeric columns are read as float first: nullable ints cannot take "NA" floats directly
+    df = pd.read_csv(csv_path, dtype={c: t for c, t in SCHEMA.items() if t in ("category", "str")})
+    df = df.astype({c: t for c, t in SCHEMA.items() if c in df.columns})
+    # Dates are dd/mm/YYYY apart from a few early ISO ones
+    date = pd.to_datetime(df["Date"], format="%d/%m/%Y", errors="coerce").fillna(
+        pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce"))
+    df["date"] = date
+    df["season"] = (date.dt.year - (date.dt.month < 7)).astype("Int64")
+    return df
+
+
+def build_snapshot(csv_path: str = HISTORY_CSV, root: str = SNAPSHOT_DIR) -> dict:
+    """Rewrite the snapshot if the CSV (or schema) changed; return the manifest."""
+    manifest = _read_manifest(root)
+    stamp = _source_stamp(csv_path)
+    if manifest["source"] == stamp and os.path.exists(os.path.join(root, SNAPSHOT)):
+        return manifest
+
+    df = read_csv(csv_path)
+    os.makedirs(root, exist_ok=True)
+    tmp = os.path.join(root, f"{SNAPSHOT}.{os.getpid()}.tmp")
+    feather.write_feather(df, tmp, compression="uncompressed")
+    os.replace(tmp, os.path.join(root, SNAPSHOT))
+    manifest = {"source": stamp, "rows": len(df)}
+    with open(os.path.join(root, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def load_history(csv_path: str = HISTORY_CSV, root: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """The typed match history, from the snapshot (rebuilt first if stale)."""
+    build_snapshot(csv_path, root)
+    return feather.read_feather(os.path.join(root, SNAPSHOT), memory_map=True)
+
+
+def played_matches(history: pd.DataFrame) -> pd.DataFrame:
+    """Matches with both scores numeric and a date, in date order, with gf/ga and W/D/L from Oldham's side."""
+    gf = pd.to_numeric(history["goals1"].astype("str"), errors="coerce")
+    ga = pd.to_numeric(history["goals2"].astype("str"), errors="coerce")
+    played = history.assign(gf=gf, ga=ga)[gf.notna() & ga.notna() & history["date"].notna()]
+    played = played.astype({"gf": "int64", "ga": "int64", "season": "int64"})
+    played["result"] = np.select([played["gf"] > played["ga"], played["gf"] == played["ga"]], ["W", "D"], "L")
+    return played.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    manifest = build_snapshot()
+    print(f"{manifest['rows']} matches in {SNAPSHOT_DIR}/{SNAPSHOT} ({time.perf_counter() - start:.2f}s)")
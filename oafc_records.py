@@ -0,0 +1,199 @@
+"""Head-to-head and records engine over Oldham's full match history.
+
+Competitive played matches from oafc-all-history-1907-08-on.csv (friendlies
+and tour matches are left out) are sorted by date once and indexed:
+    - opposition -> row positions, and a head-to-head table (P/W/D/L/GF/GA)
+    - streak runs for each streak kind, found by run-length encoding the
+      per-match flags (won, unbeaten, scored, ...)
+    - wins ordered by margin, overall and per venue, division, manager and season
+
+Queries read from these indexes only. New results are appended incrementally:
+each index is updated for the new rows without rescanning the history.
+
+    python oafc_records.py [opposition]
+"""
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import oafc_history
+
+HISTORY_CSV = oafc_history.HISTORY_CSV
+STREAKS = ["winning", "unbeaten", "scoring", "clean sheet", "winless", "losing"]
+WIN_DIMENSIONS = ["venue", "division", "manager", "season"]
+RESULT_COLS = ["date", "season", "opposition", "venue", "division", "manager", "gf", "ga", "result"]
+H2H_COLS = ["played", "won", "drawn", "lost", "gf", "ga"]
+# Divisions that are not competitive matches, so do not count towards records
+FRIENDLIES = {"Friendly", "friendly", "Tour of Hungary and Austria"}
+
+
+def load_results(path: str = HISTORY_CSV) -> pd.DataFrame:
+    """Competitive played matches (both scores numeric), in date order, with W/D/L from Oldham's side."""
+    played = oafc_history.played_matches(oafc_history.load_history(path))
+    played = played[~played["division"].isin(FRIENDLIES)].reset_index(drop=True)
+    return played.rename(columns={"Manager": "manager"})[RESULT_COLS]
+
+
+def streak_flags(results: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Per-match membership of each streak kind."""
+    r = results["result"].to_numpy()
+    return {
+        "winning": r == "W",
+        "unbeaten": r != "L",
+        "scoring": results["gf"].to_numpy() > 0,
+        "clean sheet": results["ga"].to_numpy() == 0,
+        "winless": r != "W",
+        "losing": r == "L",
+    }
+
+
+def runs(flags: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(start, length) of every run of True values."""
+    edges = np.flatnonzero(np.diff(np.r_[0, flags.astype(np.int8), 0]))
+    starts, ends = edges[::2], edges[1::2]
+    return starts, ends - starts
+
+
+def _win_key(gf, ga):
+    # Ascending key: bigger margin first, then more goals scored
+    return -(np.asarray(gf) - np.asarray(ga)) * 1000 - np.asarray(gf)
+
+
+class RecordsEngine:
+    def __init__(self, results: pd.DataFrame):
+        self.lock = threading.Lock()
+        self.results = results[RESULT_COLS].reset_index(drop=True)
+        self._build()
+
+    def _build(self):
+        res = self.results
+        self.opposition_index = {opp: idx for opp, idx in res.groupby("opposition", observed=True).indices.items()}
+
+        outcome = pd.get_dummies(res["result"]).reindex(columns=["W", "D", "L"], fill_value=False).astype(int)
+        per_match = pd.concat([pd.Series(1, index=res.index, name="played"), outcome, res[["gf", "ga"]]], axis=1)
+        per_match.columns = H2H_COLS
+        self.h2h = per_match.groupby(res["opposition"], observed=True).sum()
+
+        self.runs = {kind: runs(flags) for kind, flags in streak_flags(res).items()}
+
+        # Wins in key order, then per dimension value (each list stays in key order)
+        wins = res[res["result"] == "W"]
+        order = wins.index.to_numpy()[np.argsort(_win_key(wins["gf"], wins["ga"]), kind="stable")]
+        self.wins = {("all", None): order}
+        ordered = res.loc[order]
+        for dim in WIN_DIMENSIONS:
+            for value, idx in ordered.groupby(dim, observed=True).indices.items():
+                self.wins[(dim, value)] = order[idx]
+
+    # ---------- Queries ----------
+    def oppositions(self) -> list[str]:
+        return sorted(self.opposition_index)
+
+    def head_to_head(self, opposition: str) -> tuple[pd.Series, pd.DataFrame]:
+        """(summary, matches) against one club; summary has P/W/D/L/GF/GA and win %."""
+        if opposition not in self.h2h.index:
+            return pd.Series(0, index=H2H_COLS + ["win_pct"]), self.results.iloc[0:0]
+        summary = self.h2h.loc[opposition].astype(object)
+        summary["win_pct"] = round(100 * summary["won"] / summary["played"], 1)
+        return summary, self.results.iloc[self.opposition_index[opposition]]
+
+    def longest_streaks(self, kind: str, n: int = 10) -> pd.DataFrame:
+        starts, lengths = self.runs[kind]
+        top = np.argsort(-lengths, kind="stable")[:n]
+        first, last = starts[top], starts[top] + lengths[top] - 1
+        res = self.results
+        return pd.DataFrame({
+            "matches": lengths[top],
+            "from": res["date"].to_numpy()[first],
+            "to": res["date"].to_numpy()[last],
+            "first_opponent": res["opposition"].to_numpy()[first],
+            "last_opponent": res["opposition"].to_numpy()[last],
+            "current": last == len(res) - 1,
+        })
+
+    def current_streaks(self) -> pd.Series:
+        """Length of the run each streak kind is on after the latest result (0 if broken)."""
+        n = len(self.results)
+        return pd.Series({
+            kind: int(lengths[-1]) if len(lengths) and starts[-1] + lengths[-1] == n else 0
+            for kind, (starts, lengths) in self.runs.items()
+        })
+
+    def biggest_wins(self, by: str = "all", value=None, n: int = 10) -> pd.DataFrame:
+        """Biggest wins overall or for one venue/division/manager/season value."""
+        positions = self.wins.get((by, None if by == "all" else value), np.array([], dtype=int))[:n]
+        return self.results.iloc[positions]
+
+    # ---------- Incremental updates ----------
+    def append(self, new: pd.DataFrame):
+        """Add results played after the latest one, updating every index in place."""
+        with self.lock:
+            self._append(new)
+
+    def _append(self, new: pd.DataFrame):
+        # Caller holds self.lock
+        new = new[RESULT_COLS].reset_index(drop=True)
+        base = len(self.results)
+        self.results = pd.concat([self.results, new], ignore_index=True)
+
+        for i, row in enumerate(new.itertuples(index=False)):
+            pos = base + i
+            self.opposition_index[row.opposition] = np.append(
+                self.opposition_index.get(row.opposition, np.array([], dtype=int)), pos)
+            line = np.array([1, row.result == "W", row.result == "D", row.result == "L", row.gf, row.ga])
+            if row.opposition in self.h2h.index:
+                self.h2h.loc[row.opposition] += line
+            else:
+                self.h2h.loc[row.opposition] = line
+
+            if row.result == "W":
+                key = _win_key(row.gf, row.ga)
+                for group in [("all", None)] + [(dim, getattr(row, dim)) for dim in WIN_DIMENSIONS]:
+                    order = self.wins.get(group, np.array([], dtype=int))
+                    keys = _win_key(self.results["gf"].to_numpy()[order], self.results["ga"].to_numpy()[order])
+                    self.wins[group] = np.insert(order, np.searchsorted(keys, key, side="right"), pos)
+
+        # Extend the open run of each streak kind, or start new runs
+        for kind, flags in streak_flags(new).items():
+            starts, lengths = self.runs[kind]
+            open_run = len(lengths) and starts[-1] + lengths[-1] == base
+            add_starts, add_lengths = runs(flags)
+            if open_run and len(add_starts) and add_starts[0] == 0:
+                lengths = lengths.copy()
+                lengths[-1] += add_lengths[0]
+                add_starts, add_lengths = add_starts[1:], add_lengths[1:]
+            self.runs[kind] = (np.r_[starts, add_starts + base], np.r_[lengths, add_lengths])
+
+    def refresh(self, results: pd.DataFrame) -> int:
+        """Bring the engine up to date with a fresh load of the history; returns rows appended.
+
+        When the known results are unchanged and only new ones follow, they are
+        appended; any other edit to the history rebuilds the indexes.
+        """
+        with self.lock:
+            n = len(self.results)
+            results = results[RESULT_COLS].reset_index(drop=True)
+            if len(results) == n and results.equals(self.results):
+                return 0
+            unchanged = len(results) > n and results.iloc[:n].equals(self.results)
+            if not unchanged:
+                self.results = results
+                self._build()
+                return len(results)
+            # Appended under the same lock, so no other session can append between the check and here
+            self._append(results.iloc[n:])
+            return len(results) - n
+
+
+if __name__ == "__main__":
+    engine = RecordsEngine(load_results())
+    if len(sys.argv) > 1:
+        summary, matches = engine.head_to_head(" ".join(sys.argv[1:]))
+        print(summary.to_string())
+        print(matches.tail(10).to_string(index=False))
+    else:
+        for kind in STREAKS:
+            print(f"\nLongest {kind} runs")
+            print(engine.longest_streaks(kind, 5).to_string(index=False))
@@ -0,0 +1,198 @@
+"""Network centrality for every StatsBomb pass network, computed in batch.
+
+Each match and team's passes form a weighted directed graph (passer ->
+receiver, weighted by pass count). Per player we store passes made and
+received, distinct partners, betweenness (over 1/passes distances, so
+frequent links are short), PageRank, eigenvector centrality (on the
+undirected graph with both directions' passes summed) and weighted clustering.
+
+Results go to pass-centrality/matches.arrow, one row per match and player,
+and pass-centrality/seasons.arrow with per-player season averages. Every
+computed match's inputs hash (including matches with no passes to rank) is
+kept in pass-centrality/manifest.json, so re-runs only recompute changed
+matches.
+
+    python pass_centrality.py [--workers N] [--force]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from pass_network import data_hash
+from statsbomb_index import StatsBombIndex
+
+STORE_DIR = "pass-centrality"
+MANIFEST = "manifest.json"
+METRICS = ["passes_made", "passes_received", "partners", "betweenness", "pagerank", "eigenvector", "clustering"]
+COLUMNS = ["match_id", "match_date", "season", "team_name", "player_id", "player_name"] + METRICS + ["inputs_hash"]
+
+
+# ---------- Graphs ----------
+def team_graphs(positions: pd.DataFrame, passes: pd.DataFrame) -> dict:
+    """team -> weighted DiGraph of passes between that team's players."""
+    team_of = positions.drop_duplicates("player_name").set_index("player_name")["team_name"].astype(str)
+    edges = passes[["passer", "receiver", "pass_count"]].astype({"passer": str, "receiver": str})
+    edges = edges.assign(team=edges["passer"].map(team_of), team_to=edges["receiver"].map(team_of))
+    edges = edges[edges["team"].notna() & (edges["team"] == edges["team_to"]) & (edges["passer"] != edges["receiver"])]
+
+    graphs = {}
+    for team, team_edges in edges.groupby("team"):
+        graph = nx.DiGraph()
+        graph.add_nodes_from(team_of.index[team_of == team])
+        for passer, receiver, count in team_edges[["passer", "receiver", "pass_count"]].itertuples(index=False):
+            graph.add_edge(passer, receiver, weight=float(count), distance=1.0 / count)
+        graphs[team] = graph
+    return graphs
+
+
+def _eigenvector(graph: nx.DiGraph) -> dict:
+    undirected = nx.Graph()
+    undirected.add_nodes_from(graph)
+    for a, b, w in graph.edges(data="weight"):
+        prior = undirected.get_edge_data(a, b, {"weight": 0.0})["weight"]
+        undirected.add_edge(a, b, weight=prior + w)
+    try:
+        return nx.eigenvector_centrality(undirected, weight="weight", max_iter=1000)
+    except nx.PowerIterationFailedConvergence:
+        return {}
+
+
+def graph_metrics(graph: nx.DiGraph) -> pd.DataFrame:
+    """One row per player of the graph, indexed by player name."""
+    metrics = pd.DataFrame(index=pd.Index(list(graph), name="player_name"))
+    metrics["passes_made"] = pd.Series(dict(graph.out_degree(weight="weight")))
+    metrics["passes_received"] = pd.Series(dict(graph.in_degree(weight="weight")))
+    metrics["partners"] = pd.Series({n: len(set(graph.successors(n)) | set(graph.predecessors(n))) for n in graph})
+    metrics["betweenness"] = pd.Series(nx.betweenness_centrality(graph, weight="distance"))
+    metrics["pagerank"] = pd.Series(nx.pagerank(graph, weight="weight")) if graph.number_of_edges() else np.nan
+    metrics["eigenvector"] = pd.Series(_eigenvector(graph), dtype=float)
+    metrics["clustering"] = pd.Series(nx.clustering(graph, weight="weight"))
+    return metrics
+
+
+def match_centrality(index: StatsBombIndex, match_id) -> pd.DataFrame:
+    """Centrality rows for every player with passing data in one match."""
+    positions, passes = index.positions[match_id], index.passes[match_id]
+    if positions.empty or passes.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    match = index.match(match_id)
+    players = positions.drop_duplicates("player_name")
+    ids = pd.Series(players["player_id"].to_numpy(), index=players["player_name"].astype(str))
+
+    frames = []
+    for team, graph in team_graphs(positions, passes).items():
+        metrics = graph_metrics(graph).reset_index()
+        metrics.insert(0, "team_name", team)
+        frames.append(metrics)
+    rows = pd.concat(frames, ignore_index=True)
+    rows["player_id"] = rows["player_name"].map(ids)
+    rows["match_id"] = int(match_id)
+    rows["match_date"] = pd.Timestamp(match["match_date"])
+    rows["season"] = match["season.season_name"]
+    rows["inputs_hash"] = data_hash(positions, passes)
+    return rows[COLUMNS]
+
+
+# ---------- Batch ----------
+_worker_index = None
+
+
+def _read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _init_worker():
+    global _worker_index
+    _worker_index = StatsBombIndex()
+
+
+def _centrality_in_worker(match_id) -> pd.DataFrame:
+    return match_centrality(_worker_index, match_id)
+
+
+def season_trends(matches: pd.DataFrame) -> pd.DataFrame:
+    """Per-player, per-season averages of every metric, with the number of matches."""
+    trends = matches.groupby(["player_id", "season", "team_name"], observed=True).agg(
+        player_name=("player_name", "last"), matches=("match_id", "nunique"),
+        **{m: (m, "mean") for m in METRICS},
+    )
+    return trends.round(4).reset_index()
+
+
+def build_store(workers: int | None = None, force: bool = False, root: str = STORE_DIR) -> pd.DataFrame:
+    """Recompute centrality for new or changed matches across a process pool; returns the full table."""
+    index = StatsBombIndex()
+    path = os.path.join(root, "matches.arrow")
+    old = feather.read_feather(path) if os.path.exists(path) and not force else pd.DataFrame(columns=COLUMNS)
+
+    # match_id -> inputs hash; the table alone has no row for matches without edges
+    stored = {str(m): h for m, h in old.drop_duplicates("match_id")[["match_id", "inputs_hash"]].itertuples(index=False)}
+    if not force:
+        stored.update(_read_manifest(root))
+    match_ids = [int(m) for m in index.labels.values()]
+    current = {m: data_hash(index.positions[m], index.passes[m]) for m in match_ids if m in index.positions}
+    todo = [m for m, h in current.items() if stored.get(str(m)) != h]
+
+    fresh = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            fresh = list(pool.map(_centrality_in_worker, todo, chunksize=8))
+    keep = old[old["match_id"].isin(match_ids) & ~old["match_id"].isin(todo)]
+    table = pd.concat([keep, *[f for f in fresh if len(f)]], ignore_index=True)
+
+    for col in ("team_name", "player_name", "season"):
+        table[col] = table[col].astype(str).astype("category")
+    table = table.astype({"match_id": "int64", "player_id": "int64", **{m: "float64" for m in METRICS}})
+    table = table.sort_values(["player_id", "match_date"], kind="stable").reset_index(drop=True)
+    os.makedirs(root, exist_ok=True)
+    feather.write_feather(table, path)
+    feather.write_feather(season_trends(table), os.path.join(root, "seasons.arrow"))
+    with open(os.path.join(root, MANIFEST), "w") as f:
+        json.dump({str(m): h for m, h in current.items()}, f, indent=1)
+    return table
+
+
+# ---------- Query ----------
+class CentralityStore:
+    """Pre-computed centrality rows with player and match row indexes."""
+
+    def __init__(self, root: str = STORE_DIR):
+        self.matches = feather.read_feather(os.path.join(root, "matches.arrow"))
+        self.seasons = feather.read_feather(os.path.join(root, "seasons.arrow"))
+        # Rows are sorted by player, so each player's matches are one contiguous slice
+        ids = self.matches["player_id"].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1], True]) if len(ids) else np.array([0])
+        self.player_index = {int(ids[a]): slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])}
+        self.match_index = self.matches.groupby("match_id").indices
+
+    def player_matches(self, player_id) -> pd.DataFrame:
+        return self.matches.iloc[self.player_index.get(int(player_id), slice(0, 0))]
+
+    def match_roles(self, match_id) -> pd.DataFrame:
+        return self.matches.iloc[self.match_index.get(int(match_id), [])]
+
+    def player_seasons(self, player_id) -> pd.DataFrame:
+        return self.seasons[self.seasons["player_id"] == int(player_id)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="recompute every match")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build_store(args.workers, args.force)
+    print(f"{table['match_id'].nunique()} matches, {table['player_id'].nunique()} players "
+          f"in {STORE_DIR}/ ({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,85 @@
+"""Pass-network figures for a StatsBomb match.
+
+Passer and receiver coordinates are joined onto the pass table in one merge,
+and each team's edges are drawn as a single LineCollection with per-edge
+widths. Finished PNGs are stored with the match's report (post_match_reports.py),
+keyed by a hash of the match's positions and passes.
+"""
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from mplsoccer import Pitch
+
+FIG_WIDTH = 10
+TOUCH_SCALE = 20
+WIDTH_SCALE = 0.5
+TEAM_COLOURS = ["skyblue", "lightcoral"]
+
+
+def data_hash(*frames: pd.DataFrame) -> str:
+    """Short content hash of some frames' values (categoricals hash by value, not code)."""
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def network_frames(positions: pd.DataFrame, passes: pd.DataFrame, home_team: str):
+    """(nodes, edges, teams): pitch coordinates per player and per passing pair, home team first.
+
+    The away team attacks right to left and y is flipped so the pitch reads bottom to top.
+    """
+    nodes = positions[["team_name", "player_name", "average_x", "average_y", "touches"]].copy()
+    for col in ("team_name", "player_name"):
+        nodes[col] = nodes[col].astype(str)
+    away_team = next(t for t in nodes["team_name"].unique() if t != home_team)
+    away = nodes["team_name"] == away_team
+    nodes.loc[away, "average_x"] = 120 - nodes.loc[away, "average_x"]
+    nodes["average_y"] = 80 - nodes["average_y"]
+
+    coords = nodes.set_index("player_name")[["team_name", "average_x", "average_y"]]
+    edges = passes[["passer", "receiver", "pass_count"]].astype({"passer": str, "receiver": str})
+    # Pass lines within the same team; pairs with an unplaced player are dropped
+    edges = edges.join(coords, on="passer").join(coords, on="receiver", rsuffix="_to", how="inner")
+    edges = edges[edges["team_name"] == edges["team_name_to"]]
+    return nodes, edges, [home_team, away_team]
+
+
+def render_png(positions: pd.DataFrame, passes: pd.DataFrame, home_team: str) -> bytes:
+    nodes, edges, teams = network_frames(positions, passes, home_team)
+    pitch = Pitch(pitch_type="statsbomb", line_color="black", pitch_color="white")
+    # A bare Figure (no pyplot) so renders are safe to run in threads and worker processes
+    fig = Figure()
+    ax = fig.add_axes((0, 0, 1, 1))
+    pitch.draw(ax=ax)
+    # Size the figure to the pitch so it needs no second, "tight" layout pass when saved
+    (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+    fig.set_size_inches(FIG_WIDTH, FIG_WIDTH * abs(y1 - y0) / abs(x1 - x0))
+
+    for i, team in enumerate(teams):
+        team_nodes = nodes[nodes["team_name"] == team]
+        team_edges = edges[edges["team_name"] == team]
+        segments = np.stack([
+            team_edges[["average_x", "average_y"]].to_numpy(),
+            team_edges[["average_x_to", "average_y_to"]].to_numpy(),
+        ], axis=1)
+        ax.add_collection(LineCollection(
+            segments, linewidths=team_edges["pass_count"].to_numpy() * WIDTH_SCALE,
+            color=TEAM_COLOURS[i], alpha=0.6, zorder=1,
+        ))
+        ax.scatter(
+            team_nodes["average_x"], team_nodes["average_y"], s=team_nodes["touches"] * TOUCH_SCALE,
+            c=TEAM_COLOURS[i], edgecolors="black", linewidth=1, zorder=2,
+        )
+        for name, x, y in team_nodes[["player_name", "average_x", "average_y"]].itertuples(index=False):
+            ax.text(x, y, name, va="center", ha="center", fontsize=8, zorder=3)
+
+    buf = io.BytesIO()
+    # Light compression: encoding time matters more than a few KB on disk
+    fig.savefig(buf, format="png", pil_kwargs={"compress_level": 1})
+    return buf.getvalue()
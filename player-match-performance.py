@@ -1,65 +1,74 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import altair as alt
 
-st.title("Player Performance Tracker")
+import player_ratings
 
-# --- Load the file directly (adjust path as needed) ---
-DATA_PATH = "player-match-ratings.csv"
-df = pd.read_csv(DATA_PATH)
+st.title("Player Performance Tracker")
 
-# Ensure match_date is datetime
-date_ok = False
-if "match_date" in df.columns:
-    df["match_date"] = pd.to_datetime(df["match_date"], errors="coerce")
-    if df["match_date"].notna().any():
-        date_ok = True
+# --- Load the file once per server into a typed, player-indexed store (reloaded when the file changes) ---
+DATA_PATH = player_ratings.DATA_PATH
 
-# Sanitize column names for Altair (replace . with _)
-df = df.rename(columns=lambda c: c.replace(".", "_"))
+@st.cache_resource
+def load_store(path, mtime):
+    return player_ratings.RatingStore(path)
 
-# Identify score columns
-score_columns = [col for col in df.columns if col.startswith("cat_") or col.endswith("_score") or col.startswith("player_match_")]
+store = load_store(DATA_PATH, os.path.getmtime(DATA_PATH))
+date_ok = store.date_ok
+score_columns = store.score_columns
 
 # Sidebar selections
 default_team = "Oldham Athletic"
-teams_sorted = sorted(df["team_name"].unique())
+teams_sorted = sorted(store.team_players)
 
 team_name = st.selectbox(
     "Select team",
     teams_sorted,
     index=teams_sorted.index(default_team) if default_team in teams_sorted else 0
 )
-available_players = df.loc[df["team_name"] == team_name, "player_name"].unique()
-player_name = st.selectbox("Select player", sorted(available_players))
-score_metric = st.selectbox("Select score metric", score_columns)
+mode = st.radio("Mode", ["Single player", "Compare players"], horizontal=True)
 
-# Filter for player (strip spaces just in case)
-player_df = df[df["player_name"].str.strip() == player_name.strip()].copy()
+# --- Comparison mode: aggregates and binned series are computed here, only those go to the chart ---
+if mode == "Compare players":
+    compare_players = st.multiselect("Players", store.players(team_name), default=store.players(team_name))
+    compare_metrics = st.multiselect("Score metrics", score_columns, default=score_columns[:3])
+    if not compare_players or not compare_metrics:
+        st.info("Pick at least one player and one metric to compare.")
+        st.stop()
 
-# Convert score column to numeric (fixes string issues)
-player_df[score_metric] = pd.to_numeric(player_df[score_metric], errors="coerce")
-
-# Build match label
-if {"home_team_home_team_name", "away_team_away_team_name", "match_date"} <= set(player_df.columns):
-    player_df["match_label"] = (
-        player_df["home_team_home_team_name"] + " vs " + player_df["away_team_away_team_name"] +
-        " (" + player_df["match_date"].dt.strftime("%Y-%m-%d") + ")"
-    )
-elif {"teams", "match_date"} <= set(player_df.columns):
-    player_df["match_label"] = (
-        player_df["teams"] + " (" + player_df["match_date"].dt.strftime("%Y-%m-%d") + ")"
+    summary, series = store.compare(compare_players, compare_metrics)
+    st.caption(
+        f"Each line averages a player's scores into at most {player_ratings.MAX_BINS} time bins; "
+        f"form is the rolling mean of the last {player_ratings.FORM_WINDOW} matches."
     )
-else:
-    # fallback to just date if nothing else available
-    player_df["match_label"] = player_df["match_date"].dt.strftime("%Y-%m-%d")
+    chart = alt.Chart(series).mark_line(point=True).encode(
+        x=alt.X("x:T", title="Date") if date_ok else alt.X("x:Q", title="Match number"),
+        y=alt.Y("value:Q", title=None),
+        color=alt.Color("player:N", legend=alt.Legend(orient="bottom", title=None)),
+        tooltip=["player", "metric", "value", "matches"],
+    ).properties(height=220).facet(row=alt.Row("metric:N", title=None)).resolve_scale(y="independent")
+    st.altair_chart(chart, use_container_width=True)
+
+    for stat, title in [("mean", "Season average"), ("form", "Current form"), ("pct_league", "League percentile (latest)")]:
+        st.markdown(f"**{title}**")
+        table = summary.pivot(index="player", columns="metric", values=stat)[compare_metrics]
+        st.dataframe(table.style.background_gradient(cmap="RdYlGn", axis=0).format(precision=1), use_container_width=True)
+    st.stop()
+
+player_name = st.selectbox("Select player", store.players(team_name))
+score_metric = st.selectbox("Select score metric", score_columns)
+
+# The player's rows are one slice of the store, already typed and sorted by date
+player_df = store.player_rows(player_name).copy()
+form_df = store.player_form(player_name, score_metric)
+player_df[f"{score_metric} (last {player_ratings.FORM_WINDOW})"] = form_df["rolling"].to_numpy()
+player_df[f"{score_metric} (EWMA)"] = form_df["ewma"].to_numpy()
 
-# Sort by date if available
 if date_ok:
-    player_df = player_df.sort_values("match_date")
     x_axis = alt.X("match_date:T", title="Date")
 else:
-    player_df = player_df.reset_index().rename(columns={"index": "match_order"})
     x_axis = alt.X("match_order:O", title="Match order")
 
 # --- Diagnostics / status box ---
@@ -87,9 +96,22 @@ if matches_count > 0 and not player_df[score_metric].isna().all():
     )
     points = base.mark_point(size=80, filled=True, color="steelblue")
     line   = base.mark_line(color="orange")
-    chart = points + line
+    # Form lines: rolling mean and EWMA of the metric
+    form = alt.Chart(player_df).transform_fold(
+        [f"{score_metric} (last {player_ratings.FORM_WINDOW})", f"{score_metric} (EWMA)"], as_=["form", "value"]
+    ).mark_line(strokeDash=[4, 3]).encode(
+        x=x_axis, y=alt.Y("value:Q"), color=alt.Color("form:N", legend=alt.Legend(orient="bottom", title=None))
+    )
+    chart = points + line + form
     st.altair_chart(chart, use_container_width=True)
 
+    latest = form_df.dropna(subset=["pct_team"]).tail(1)
+    if len(latest):
+        st.caption(
+            f"Latest match percentile: {latest['pct_team'].iat[0]:.0f} within {team_name}, "
+            f"{latest['pct_league'].iat[0]:.0f} across the league."
+        )
+
     # Debug preview
     with st.expander("See match-by-match scores"):
       # Select only relevant columns to display
@@ -0,0 +1,113 @@
+"""Trigram index over Oldham player names for autocomplete and canonicalisation.
+
+Names come from oafc-player-names-1989-on.csv plus the player column headers of
+every squad-grid-YYYY.csv. Each distinct name gets a canonical player ID (a
+slug of its normalised form), and free text is matched by the Dice overlap of
+character trigrams, so misspellings such as "Kitchin" still find "Mark Kitching".
+"""
+import glob
+import html
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from squad_events import get_player_cols, season_of
+
+NAMES_CSV = "oafc-player-names-1989-on.csv"
+GRID_GLOB = "squad-grid-*.csv"
+# Free text resolves to a player when the best match is strong, or clearly ahead of the next best
+MATCH_THRESHOLD = 0.8
+MATCH_FLOOR = 0.5
+MATCH_MARGIN = 0.15
+
+
+def normalise(name: str) -> str:
+    """Lower-case, accent-free (and entity-decoded), single-spaced letters and digits."""
+    name = unicodedata.normalize("NFKD", html.unescape(str(name))).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+def player_id(name: str) -> str:
+    return normalise(name).replace(" ", "-")
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+class PlayerNameIndex:
+    def __init__(self, names):
+        # One entry per canonical ID; the first spelling seen is the display name
+        by_id = {}
+        for name in names:
+            if isinstance(name, str) and normalise(name):
+                by_id.setdefault(player_id(name), html.unescape(name).strip())
+        self.ids = np.array(sorted(by_id), dtype=object)
+        self.names = np.array([by_id[i] for i in self.ids], dtype=object)
+        self.id_lookup = {pid: i for i, pid in enumerate(self.ids)}
+
+        # trigram -> array of name positions (posting lists)
+        norm = [normalise(n) for n in self.names]
+        self.sizes = np.array([len(trigrams(n)) for n in norm])
+        postings = defaultdict(list)
+        for i, n in enumerate(norm):
+            for g in trigrams(n):
+                postings[g].append(i)
+        self.postings = {g: np.array(ix, dtype=np.int32) for g, ix in postings.items()}
+        self.norm = np.array(norm, dtype=str)
+
+    def _rank(self, text: str, limit: int):
+        """Positions and Dice scores of the best `limit` names for free text."""
+        query = normalise(text)
+        grams = trigrams(query) if query else set()
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return np.array([], dtype=int), np.array([])
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.ids))
+        score = 2 * shared / (len(grams) + self.sizes)
+        # Names that start with what has been typed so far rank first
+        prefix = np.char.startswith(self.norm, query) | (np.char.find(self.norm, f" {query}") >= 0)
+        top = np.argsort(-(score + prefix), kind="stable")[:limit]
+        top = top[shared[top] > 0]
+        return top, score[top]
+
+    def search(self, text: str, limit: int = 10) -> pd.DataFrame:
+        """Ranked (player_id, name, score) matches for free text; score is the trigram Dice coefficient."""
+        top, score = self._rank(text, limit)
+        return pd.DataFrame({"player_id": self.ids[top], "name": self.names[top], "score": score.round(3)})
+
+    def canonical(self, text: str):
+        """(player_id, name) for free text, or None when nothing is close enough."""
+        if not isinstance(text, str) or not text.strip():
+            return None
+        exact = self.id_lookup.get(player_id(text))
+        if exact is not None:
+            return self.ids[exact], self.names[exact]
+        top, score = self._rank(text, 2)
+        if not len(top):
+            return None
+        runner_up = score[1] if len(score) > 1 else 0.0
+        if score[0] >= MATCH_THRESHOLD or (score[0] >= MATCH_FLOOR and score[0] - runner_up >= MATCH_MARGIN):
+            return self.ids[top[0]], self.names[top[0]]
+        return None
+
+
+def season_squads(pattern: str = GRID_GLOB) -> dict[int, list[str]]:
+    """Season -> player names from each squad grid's header row (HTML entities decoded)."""
+    return {
+        season_of(path): [html.unescape(c) for c in get_player_cols(pd.read_csv(path, nrows=0))]
+        for path in sorted(glob.glob(pattern))
+    }
+
+
+def build_index(names_csv: str = NAMES_CSV, pattern: str = GRID_GLOB) -> PlayerNameIndex:
+    names = pd.read_csv(names_csv)["x"].dropna().tolist() if os.path.exists(names_csv) else []
+    for squad in season_squads(pattern).values():
+        names.extend(squad)
+    return PlayerNameIndex(names)
@@ -0,0 +1,162 @@
+"""Typed, player-indexed store for player-match-ratings.csv with rolling form metrics.
+
+The CSV is read once: column names lose their dots (Altair cannot use them),
+player names are stripped, team and player become categoricals and every
+score column is coerced to float. Rows are sorted by player then date, so a
+player's history is one contiguous slice.
+
+Form metrics for every score column are computed for all players in one
+grouped pass: a rolling mean and an EWMA over the player's last matches, and
+the percentile of each score against the player's team and the whole league.
+"""
+import numpy as np
+import pandas as pd
+
+DATA_PATH = "player-match-ratings.csv"
+FORM_WINDOW = 5
+EWM_SPAN = 5
+FORM_STATS = ["rolling", "ewma", "pct_team", "pct_league"]
+# Points per player and metric in comparison charts
+MAX_BINS = 24
+
+
+def is_score_column(col: str) -> bool:
+    return col.startswith("cat_") or col.endswith("_score") or col.startswith("player_match_")
+
+
+def _segment_rolling_mean(values: np.ndarray, starts: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean (NaN-skipping, min 1 value) down each column, restarting at each segment start."""
+    n = len(values)
+    present = ~np.isnan(values)
+    csum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(np.where(present, values, 0), axis=0)])
+    ccount = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(present, axis=0)])
+    # Window start per row: `window` rows back, but never before the row's own segment
+    seg_start = starts[np.searchsorted(starts, np.arange(n), side="right") - 1]
+    lo = np.maximum(np.arange(n) - window + 1, seg_start)
+    hi = np.arange(n) + 1
+    count = ccount[hi] - ccount[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, (csum[hi] - csum[lo]) / count, np.nan)
+
+
+class RatingStore:
+    def __init__(self, path: str = DATA_PATH):
+        df = pd.read_csv(path)
+        df = df.rename(columns=lambda c: c.replace(".", "_"))
+        # Original file order, used when there are no usable dates
+        df["match_order"] = np.arange(len(df))
+
+        self.date_ok = False
+        if "match_date" in df.columns:
+            df["match_date"] = pd.to_datetime(df["match_date"], errors="coerce")
+            self.date_ok = bool(df["match_date"].notna().any())
+
+        self.score_columns = [c for c in df.columns if is_score_column(c)]
+        df[self.score_columns] = df[self.score_columns].apply(pd.to_numeric, errors="coerce").astype("float64")
+        df["player_name"] = df["player_name"].astype(str).str.strip().astype("category")
+        df["team_name"] = df["team_name"].astype("category")
+        df["match_label"] = self._match_labels(df)
+
+        order = ["player_name", "match_date", "match_order"] if self.date_ok else ["player_name", "match_order"]
+        self.df = df.sort_values(order, kind="stable").reset_index(drop=True)
+
+        # player -> contiguous row range; team -> its players
+        codes = self.df["player_name"].cat.codes.to_numpy()
+        self.starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+        ends = np.r_[self.starts[1:], len(codes)]
+        names = self.df["player_name"].to_numpy()
+        self.player_index = {names[a]: slice(a, b) for a, b in zip(self.starts, ends)}
+        self.team_players = {
+            team: sorted(players) for team, players in
+            self.df.groupby("team_name", observed=True)["player_name"].unique().items()
+        }
+        self.form = self._form_metrics()
+
+    @staticmethod
+    def _match_labels(df: pd.DataFrame) -> pd.Series:
+        day = df["match_date"].dt.strftime("%Y-%m-%d") if "match_date" in df else pd.Series("", index=df.index)
+        if {"home_team_home_team_name", "away_team_away_team_name"} <= set(df.columns):
+            return df["home_team_home_team_name"] + " vs " + df["away_team_away_team_name"] + " (" + day + ")"
+        if "teams" in df.columns:
+            return df["teams"] + " (" + day + ")"
+        # fall back to just the date
+        return day
+
+    def _form_metrics(self) -> pd.DataFrame:
+        """(metric, stat) columns aligned with self.df rows."""
+        scores = self.df[self.score_columns]
+        values = scores.to_numpy()
+        rolling = _segment_rolling_mean(values, self.starts, FORM_WINDOW)
+        ewma = (
+            scores.groupby(self.df["player_name"], observed=True, sort=False)
+            .ewm(span=EWM_SPAN, ignore_na=True).mean()
+            .droplevel(0).sort_index().to_numpy()
+        )
+        pct_team = scores.groupby(self.df["team_name"], observed=True).rank(pct=True).to_numpy()
+        pct_league = scores.rank(pct=True).to_numpy()
+
+        stats = np.stack([rolling, ewma, pct_team * 100, pct_league * 100], axis=2)
+        columns = pd.MultiIndex.from_product([self.score_columns, FORM_STATS], names=["metric", "stat"])
+        return pd.DataFrame(stats.reshape(len(values), -1), columns=columns).round(2)
+
+    def players(self, team: str) -> list[str]:
+        return self.team_players.get(team, [])
+
+    def player_rows(self, player: str) -> pd.DataFrame:
+        return self.df.iloc[self.player_index.get(player.strip(), slice(0, 0))]
+
+    def player_form(self, player: str, metric: str) -> pd.DataFrame:
+        """The player's form stats for one metric, aligned with player_rows()."""
+        return self.form[metric].iloc[self.player_index.get(player.strip(), slice(0, 0))]
+
+    # ---------- Comparison ----------
+    def compare(self, players, metrics, bins: int = MAX_BINS):
+        """(summary, series) for several players and metrics, aggregated for charting.
+
+        summary has one row per player and metric: matches, mean, median, latest
+        rolling form and latest league percentile. series has each player's
+        metric averaged into at most `bins` equal-width bins over the selected
+        dates (or match numbers, without dates), so its size does not grow
+        with the number of matches.
+        """
+        slices = [self.player_index[p] for p in players if p in self.player_index]
+        rows = np.concatenate([np.arange(s.start, s.stop) for s in slices]) if slices else np.array([], dtype=int)
+        picked = self.df.iloc[rows]
+        if self.date_ok:
+            raw = picked["match_date"].to_numpy("datetime64[ns]")
+            x = raw.astype("int64").astype(float)
+            # NaT would cast to the minimum int64 and stretch the bins back to 1677
+            x[np.isnat(raw)] = np.nan
+        else:
+            x = picked.groupby("player_name", observed=True).cumcount().to_numpy(float) + 1
+
+        long = pd.DataFrame({"player": picked["player_name"].astype(str).to_numpy(), "x": x})
+        frames = []
+        for metric in metrics:
+            frames.append(long.assign(
+                metric=metric,
+                value=picked[metric].to_numpy(),
+                form=self.form[(metric, "rolling")].to_numpy()[rows],
+                pct_league=self.form[(metric, "pct_league")].to_numpy()[rows],
+            ))
+        long = pd.concat(frames, ignore_index=True) if frames else long.assign(metric=[], value=[], form=[], pct_league=[])
+
+        by = long.groupby(["player", "metric"], sort=False)
+        summary = by.agg(
+            matches=("value", "count"), mean=("value", "mean"), median=("value", "median"),
+            form=("form", "last"), pct_league=("pct_league", "last"),
+        ).round(2).reset_index()
+
+        # Equal-width bins over the whole selection, labelled by their midpoint
+        valid = long["x"].notna()
+        lo, hi = (long.loc[valid, "x"].min(), long.loc[valid, "x"].max()) if valid.any() else (0.0, 1.0)
+        edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+        long["bin"] = np.clip(np.searchsorted(edges, long["x"], side="right") - 1, 0, bins - 1)
+        series = long[valid].groupby(["player", "metric", "bin"], sort=False).agg(
+            value=("value", "mean"), matches=("value", "count"),
+        ).reset_index()
+        series = series[series["matches"] > 0]
+        mid = (edges[:-1] + edges[1:]) / 2
+        series["x"] = pd.to_datetime(mid[series["bin"]].astype("int64")).normalize() if self.date_ok else mid[series["bin"]].round(1)
+        series["value"] = series["value"].round(2)
+        return summary, series.drop(columns="bin")
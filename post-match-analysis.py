@@ -1,29 +1,40 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from mplsoccer import Pitch
 
-# --- Example data loading (replace with your actual data) ---
-matches_df = pd.read_csv("statsbomb-matches.csv")
-summary_stats_df = pd.read_csv("statsbomb-summary_stats.csv")
-player_positions_df = pd.read_csv("statsbomb-player_positions.csv")  # avg_x, avg_y for each player
-pass_network_df = pd.read_csv("statsbomb-passing_network.csv")       # pass counts between players
+import pass_centrality
+import post_match_reports
+import statsbomb_index
 
-# --- Sidebar match selection ---
-match_options = matches_df[["match_id", "home_team.home_team_name", "away_team.away_team_name", "match_date"]]
-match_options["label"] = match_options.apply(lambda row: f"{row['home_team.home_team_name']} vs {row['away_team.away_team_name']} ({row['match_date']})", axis=1)
+# --- Data loading: each table is split by match_id once per server, reloaded when a CSV changes ---
+@st.cache_resource
+def load_index(stamp):
+    return statsbomb_index.StatsBombIndex()
+
+index = load_index(statsbomb_index.source_stamp())
 
-selected_label = st.sidebar.selectbox("Select Match", match_options["label"])
-selected_match_id = match_options.loc[
-    match_options["label"] == selected_label, "match_id"
-].values[0]
+# Network centrality is computed in batch (python pass_centrality.py); the app only looks it up
+@st.cache_resource
+def load_centrality(mtime):
+    return pass_centrality.CentralityStore()
+
+centrality_path = os.path.join(pass_centrality.STORE_DIR, "seasons.arrow")
+centrality = load_centrality(os.path.getmtime(centrality_path)) if os.path.exists(centrality_path) else None
+
+# --- Sidebar match selection ---
+selected_label = st.sidebar.selectbox("Select Match", list(index.labels))
+selected_match_id = index.labels[selected_label]
 
 # --- Tabs ---
-tab1, tab2 = st.tabs(["📊 Summary", "🧠 Passing Network"])
+tab1, tab2, tab3 = st.tabs(["📊 Summary", "🧠 Passing Network", "🕸️ Network Roles"])
+
+# Served from the pre-rendered report bundle; built on the spot if missing or stale
+report = post_match_reports.load_report(index, selected_match_id)
 
 with tab1:
     st.header("Match Summary Statistics")
-    match_summary = summary_stats_df[summary_stats_df["match_id"] == selected_match_id]
+    match_summary = report["summary"]
 
     if match_summary.empty:
         st.warning("No summary data available for this match.")
@@ -33,97 +44,19 @@ with tab1:
 with tab2:
     st.header("Passing Network (by team)")
 
-    match_positions = player_positions_df[
-        player_positions_df["match_id"] == selected_match_id
-    ].copy()
-
-    match_passes = pass_network_df[
-        pass_network_df["match_id"] == selected_match_id
-    ]
-
-    if match_positions.empty or match_passes.empty:
+    if report["png"] is None:
         st.warning("No passing network data available for this match.")
     else:
-        touch_scale = 20
-        team_colors = ["skyblue", "lightcoral"]
-
-        # Home / Away from matches_df
-        home_team_name = matches_df.loc[
-            matches_df["match_id"] == selected_match_id, "home_team.home_team_name"
-        ].values[0]
-        away_team_name = [t for t in match_positions["team_name"].unique() if t != home_team_name][0]
-
-        # Flip away team x coords
-        away_mask = match_positions["team_name"] == away_team_name
-        match_positions.loc[away_mask, "average_x"] = 120 - match_positions.loc[away_mask, "average_x"]
-        
-        # Flip all y coords so pitch displays correctly (bottom to top)
-        match_positions["average_y"] = 80 - match_positions["average_y"]
-
-        # Create pitch
-        pitch = Pitch(pitch_type='statsbomb', line_color='black', pitch_color='white')
-        fig, ax = pitch.draw(figsize=(10, 7))
-
-        # Draw each team
-        for i, team in enumerate([home_team_name, away_team_name]):
-            team_positions = match_positions[match_positions["team_name"] == team]
-
-            pitch.scatter(
-                team_positions["average_x"],
-                team_positions["average_y"],
-                s=team_positions["touches"] * touch_scale,
-                c=team_colors[i], edgecolors="black", linewidth=1, ax=ax, zorder=2
-            )
-
-            for _, row in team_positions.iterrows():
-                pitch.annotate(
-                    row["player_name"],
-                    xy=(row["average_x"], row["average_y"]),
-                    va="center", ha="center", fontsize=8, ax=ax, zorder=3
-                )
-
-            # Pass lines within same team
-            team_passes = match_passes[
-                match_passes["passer"].isin(team_positions["player_name"])
-            ]
-            for _, row in team_passes.iterrows():
-                passer_pos = team_positions.loc[
-                    team_positions["player_name"] == row["passer"], ["average_x", "average_y"]
-                ].values
-                receiver_pos = team_positions.loc[
-                    team_positions["player_name"] == row["receiver"], ["average_x", "average_y"]
-                ].values
-
-                if passer_pos.size > 0 and receiver_pos.size > 0:
-                    pitch.lines(
-                        passer_pos[0][0], passer_pos[0][1],
-                        receiver_pos[0][0], receiver_pos[0][1],
-                        lw=row["pass_count"] * 0.5,
-                        color=team_colors[i], alpha=0.6, ax=ax, zorder=1
-                    )
-
-        st.pyplot(fig)
+        home_team_name, away_team_name = report["home_team"], report["away_team"]
+        st.image(report["png"])
 
         # ---- Players with most unique connections ----
         st.subheader("Players with Most Passing Connections")
-
-        connections_df = match_passes.groupby("passer")["receiver"].nunique().reset_index()
-        connections_df.columns = ["player_name", "unique_connections"]
-        connections_df = connections_df.merge(
-            match_positions[["player_name", "team_name"]],
-            on="player_name",
-            how="left"
-        )
+        connections_df = report["connections"]
 
         # ---- Player combinations with most passes ----
         st.subheader("Top Passing Combinations")
-
-        combinations_df = match_passes[["passer", "receiver", "pass_count"]].copy()
-        combinations_df = combinations_df.merge(
-            match_positions[["player_name", "team_name"]],
-            left_on="passer", right_on="player_name", how="left"
-        ).drop(columns=["player_name"])
-        combinations_df.rename(columns={"team_name": "team"}, inplace=True)
+        combinations_df = report["combinations"]
 
         for team in [home_team_name, away_team_name]:
             st.markdown(f"**{team}**")
@@ -136,3 +69,30 @@ with tab2:
                 .sort_values("pass_count", ascending=False)
             st.markdown("*Most frequent passing combinations*")
             st.dataframe(team_combos, hide_index=True)
+
+        # ---- Network roles from the batch centrality table ----
+        if centrality is not None:
+            st.subheader("Network Roles")
+            roles = centrality.match_roles(selected_match_id)
+            st.dataframe(
+                roles[["team_name", "player_name"] + pass_centrality.METRICS]
+                .sort_values(["team_name", "pagerank"], ascending=[True, False]),
+                hide_index=True
+            )
+
+with tab3:
+    st.header("Player Network Roles by Season")
+
+    if centrality is None:
+        st.info("Network centrality has not been computed yet: run `python pass_centrality.py`.")
+    else:
+        players = centrality.seasons.drop_duplicates("player_id").sort_values("player_name")
+        player_id = st.selectbox(
+            "Player",
+            players["player_id"],
+            format_func=dict(zip(players["player_id"], players["player_name"])).get
+        )
+        st.dataframe(centrality.player_seasons(player_id), hide_index=True)
+
+        metric = st.radio("Metric", pass_centrality.METRICS[3:], horizontal=True)
+        st.line_chart(centrality.player_matches(player_id).set_index("match_date")[metric])
@@ -0,0 +1,185 @@
+"""Pre-rendered post-match reports for every StatsBomb match.
+
+A report is the match's summary table, pass-network PNG and passing
+connection/combination tables, stored under post-match-reports/<match_id>/
+with a hash of the inputs it was built from. Each <match_id> is a symlink to
+a versioned directory, so a rebuild is swapped in atomically while the
+previous version stays readable. post-match-analysis.py serves
+reports from here, building any that are missing or stale; the batch mode
+fills the whole bundle across a process pool and skips unchanged matches.
+
+    python post_match_reports.py [--workers N] [--force] [--slowest N]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow.feather as feather
+
+import pass_network
+from statsbomb_index import StatsBombIndex
+
+REPORT_DIR = "post-match-reports"
+META = "report.json"
+TABLES = ["summary", "connections", "combinations"]
+
+
+# ---------- Tables ----------
+def connection_rankings(positions: pd.DataFrame, passes: pd.DataFrame) -> pd.DataFrame:
+    """Unique passing partners per passer, with their team."""
+    connections = passes.groupby("passer", observed=True)["receiver"].nunique().reset_index()
+    connections.columns = ["player_name", "unique_connections"]
+    connections["player_name"] = connections["player_name"].astype(str)
+    players = positions[["player_name", "team_name"]].astype(str)
+    return connections.merge(players, on="player_name", how="left")
+
+
+def passing_combinations(positions: pd.DataFrame, passes: pd.DataFrame) -> pd.DataFrame:
+    """Passer -> receiver pass counts, with the passer's team."""
+    combinations = passes[["passer", "receiver", "pass_count"]].astype({"passer": str, "receiver": str})
+    players = positions[["player_name", "team_name"]].astype(str)
+    combinations = combinations.merge(players, left_on="passer", right_on="player_name", how="left")
+    return combinations.drop(columns=["player_name"]).rename(columns={"team_name": "team"})
+
+
+# ---------- Reports ----------
+def match_inputs(index: StatsBombIndex, match_id):
+    return index.summary[match_id], index.positions[match_id], index.passes[match_id]
+
+
+def inputs_hash(summary: pd.DataFrame, positions: pd.DataFrame, passes: pd.DataFrame) -> str:
+    return pass_network.data_hash(summary, positions, passes)
+
+
+def _report_dir(match_id, root: str) -> str:
+    return os.path.join(root, str(int(match_id)))
+
+
+def _read_meta(path: str) -> dict:
+    try:
+        with open(os.path.join(path, META)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def build_report(index: StatsBombIndex, match_id, root: str = REPORT_DIR) -> dict:
+    """Render one match's report into the bundle; returns its metadata, including render time."""
+    start = time.perf_counter()
+    summary, positions, passes = match_inputs(index, match_id)
+    home_team = index.match(match_id)["home_team.home_team_name"]
+    tables = {"summary": summary.reset_index(drop=True)}
+    meta = {"match_id": int(match_id), "hash": inputs_hash(summary, positions, passes),
+            "home_team": home_team, "away_team": None, "network": None}
+
+    if not positions.empty and not passes.empty:
+        meta["away_team"] = next(t for t in positions["team_name"].astype(str).unique() if t != home_team)
+        tables["connections"] = connection_rankings(positions, passes)
+        tables["combinations"] = passing_combinations(positions, passes)
+        meta["network"] = "network.png"
+
+    # Write a new version directory, then repoint the match's symlink at it, so
+    # readers (other sessions or processes) never see half a report
+    path = _report_dir(match_id, root)
+    os.makedirs(root, exist_ok=True)
+    version = tempfile.mkdtemp(dir=root, prefix=f"{int(match_id)}.")
+    for name, table in tables.items():
+        feather.write_feather(table, os.path.join(version, f"{name}.arrow"))
+    if meta["network"]:
+        with open(os.path.join(version, meta["network"]), "wb") as f:
+            f.write(pass_network.render_png(positions, passes, home_team))
+    meta["seconds"] = round(time.perf_counter() - start, 4)
+    with open(os.path.join(version, META), "w") as f:
+        json.dump(meta, f, indent=1)
+
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)  # a report from before versioning
+    link = f"{version}.link"
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, path)
+    # Keep the version just replaced for readers that resolved it; older complete ones go
+    keep = {os.path.realpath(version), previous}
+    for old in glob.glob(f"{path}.*"):
+        if os.path.realpath(old) not in keep and os.path.exists(os.path.join(old, META)):
+            shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+def is_current(index: StatsBombIndex, match_id, root: str = REPORT_DIR) -> bool:
+    return _read_meta(_report_dir(match_id, root)).get("hash") == inputs_hash(*match_inputs(index, match_id))
+
+
+def load_report(index: StatsBombIndex, match_id, root: str = REPORT_DIR) -> dict:
+    """The match's report from the bundle, built first if it is missing or its inputs have changed.
+
+    Keys: the report metadata plus a DataFrame per table (absent when the match
+    has no passing data) and "png" (bytes or None).
+    """
+    # Resolve the symlink once, so every file comes from the same version
+    path = os.path.realpath(_report_dir(match_id, root))
+    meta = _read_meta(path)
+    if meta.get("hash") != inputs_hash(*match_inputs(index, match_id)):
+        build_report(index, match_id, root)
+        path = os.path.realpath(_report_dir(match_id, root))
+        meta = _read_meta(path)
+
+    report = dict(meta, png=None)
+    for name in TABLES:
+        if os.path.exists(os.path.join(path, f"{name}.arrow")):
+            report[name] = feather.read_feather(os.path.join(path, f"{name}.arrow"))
+    if meta["network"]:
+        with open(os.path.join(path, meta["network"]), "rb") as f:
+            report["png"] = f.read()
+    return report
+
+
+# ---------- Batch ----------
+_worker_index = None
+
+
+def _init_worker():
+    global _worker_index
+    _worker_index = StatsBombIndex()
+
+
+def _build_in_worker(match_id, root: str) -> dict:
+    return build_report(_worker_index, match_id, root)
+
+
+def build_all(workers: int | None = None, force: bool = False, root: str = REPORT_DIR) -> pd.DataFrame:
+    """Render every stale report across a process pool; returns per-match timings."""
+    index = StatsBombIndex()
+    match_ids = [int(m) for m in index.labels.values()]
+    todo = match_ids if force else [m for m in match_ids if not is_current(index, m, root)]
+    os.makedirs(root, exist_ok=True)
+
+    results = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_build_in_worker, m, root) for m in todo]
+            for future in as_completed(futures):
+                results.append(future.result())
+    timings = pd.DataFrame(results, columns=["match_id", "home_team", "away_team", "seconds"])
+    return timings.sort_values("seconds", ascending=False, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render matches whose inputs are unchanged")
+    parser.add_argument("--slowest", type=int, default=10, help="how many of the slowest matches to list")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = build_all(args.workers, args.force)
+    print(f"{len(timings)} reports rendered in {time.perf_counter() - start:.1f}s")
+    if len(timings):
+        print(f"median {timings['seconds'].median():.3f}s per match; slowest:")
+        print(timings.head(args.slowest).to_string(index=False))
@@ -0,0 +1,260 @@
+"""Team-strength model that produces the forecast columns of all-eng-matches.csv.
+
+Two models are run online over the played results, one matchday at a time:
+    - Elo ratings (with home advantage) give the expected score E of each
+      fixture, split into forcPH/forcPD/forcPA with a draw share that peaks
+      for evenly matched sides
+    - a Poisson goals model (log-linear attack/defence per team, plus a base
+      rate and home effect) updated by gradient steps on each result gives
+      xG1/xG2
+
+Every match on the same day is processed as one vectorised round across all
+divisions (a team plays at most once a day, so this equals match-by-match
+updating). Forecasts for played matches are the ones made before kick-off;
+unplayed fixtures are forecast from the latest ratings. At a new season
+ratings regress towards their division's mean; teams new to the data start
+at the mean of the division they first appear in.
+
+The fitted state is kept in rating-model/ with the number of date-ordered
+played results it has seen and their hash, so after a matchday only the new
+results are applied. The CSV's forecast columns are rewritten in place and
+the partitioned match store is refreshed.
+
+    python rating_model.py [--csv PATH] [--refit]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import match_store
+
+MODEL_DIR = "rating-model"
+MANIFEST = "manifest.json"
+FORECAST_COLS = ["forcPH", "forcPD", "forcPA", "xG1", "xG2"]
+KEY_COLS = ["date", "div", "team1", "team2", "goals1", "goals2"]
+
+ELO_START = 1500.0
+ELO_K = 20.0
+ELO_HOME = 60.0
+# Draw probability for an evenly matched fixture (E = 0.5)
+DRAW_MAX = 0.28
+# Share of a rating's distance from its division mean kept into a new season
+SEASON_CARRY = 0.8
+BASE_GOALS = 1.3
+HOME_GOALS = 1.2
+GOALS_LR = 0.04
+GLOBAL_LR = 0.001
+
+
+def _rows_hash(rows: pd.DataFrame) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def outcome_probabilities(expected: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Home/draw/away probabilities from an Elo expected score (draws count a half)."""
+    draw = DRAW_MAX * 4 * expected * (1 - expected)
+    return expected - draw / 2, draw, 1 - expected - draw / 2
+
+
+class RatingModel:
+    def __init__(self):
+        self.teams: list[str] = []
+        self.team_index: dict[str, int] = {}
+        self.divs: list[str] = []
+        self.div_index: dict[str, int] = {}
+        self.team_div = np.array([], dtype=int)
+        self.elo = np.array([])
+        self.attack = np.array([])
+        self.defence = np.array([])
+        self.mu = np.log(BASE_GOALS)
+        self.home = np.log(HOME_GOALS)
+        self.season = None
+
+    # ---------- Teams ----------
+    def div_codes(self, divs) -> np.ndarray:
+        for div in dict.fromkeys(divs):
+            if div not in self.div_index:
+                self.div_index[div] = len(self.divs)
+                self.divs.append(div)
+        return np.array([self.div_index[d] for d in divs], dtype=int)
+
+    def team_ids(self, names, divs) -> np.ndarray:
+        """Row of each team in the rating arrays; unseen teams are added unrated (NaN)."""
+        codes = self.div_codes(divs)
+        for name, code in zip(names, codes):
+            if name not in self.team_index:
+                self.team_index[name] = len(self.teams)
+                self.teams.append(name)
+                self.team_div = np.append(self.team_div, code)
+        grow = np.full(len(self.teams) - len(self.elo), np.nan)
+        self.elo, self.attack, self.defence = (np.r_[v, grow] for v in (self.elo, self.attack, self.defence))
+        return np.array([self.team_index[n] for n in names], dtype=int)
+
+    def _div_means(self, values: np.ndarray, start: float) -> np.ndarray:
+        """Mean of each division's rated teams (`start` for a division with none)."""
+        rated = ~np.isnan(values)
+        sums = np.bincount(self.team_div[rated], weights=values[rated], minlength=len(self.divs))
+        counts = np.bincount(self.team_div[rated], minlength=len(self.divs))
+        return np.where(counts > 0, sums / np.maximum(counts, 1), start)
+
+    def place(self, ids: np.ndarray, codes: np.ndarray):
+        """Record the teams' current division; unrated ones start at its mean."""
+        self.team_div[ids] = codes
+        unrated = ids[np.isnan(self.elo[ids])]
+        if len(unrated):
+            for values, start in ((self.elo, ELO_START), (self.attack, 0.0), (self.defence, 0.0)):
+                values[unrated] = self._div_means(values, start)[self.team_div[unrated]]
+
+    def new_season(self, season):
+        """Regress every rating towards its division's mean."""
+        self.season = season
+        for values, start in ((self.elo, ELO_START), (self.attack, 0.0), (self.defence, 0.0)):
+            mean = self._div_means(values, start)[self.team_div]
+            values[:] = mean + (values - mean) * SEASON_CARRY
+
+    # ---------- Forecast and update ----------
+    def forecast(self, home: np.ndarray, away: np.ndarray) -> np.ndarray:
+        """(n, 5) array of forcPH, forcPD, forcPA, xG1, xG2."""
+        expected = 1 / (1 + 10 ** (-(self.elo[home] + ELO_HOME - self.elo[away]) / 400))
+        xg1 = np.exp(self.mu + self.home + self.attack[home] - self.defence[away])
+        xg2 = np.exp(self.mu + self.attack[away] - self.defence[home])
+        return np.column_stack([*outcome_probabilities(expected), xg1, xg2])
+
+    def update(self, home: np.ndarray, away: np.ndarray, goals1: np.ndarray, goals2: np.ndarray, forecast: np.ndarray):
+        """Apply one round of results, given the round's pre-match forecast."""
+        pH, pD = forecast[:, 0], forecast[:, 1]
+        expected = pH + pD / 2
+        score = np.where(goals1 > goals2, 1.0, np.where(goals1 == goals2, 0.5, 0.0))
+        delta = ELO_K * (score - expected)
+        np.add.at(self.elo, home, delta)
+        np.add.at(self.elo, away, -delta)
+
+        # Gradient of the Poisson log-likelihood is observed minus expected goals
+        r1, r2 = goals1 - forecast[:, 3], goals2 - forecast[:, 4]
+        np.add.at(self.attack, home, GOALS_LR * r1)
+        np.add.at(self.defence, away, -GOALS_LR * r1)
+        np.add.at(self.attack, away, GOALS_LR * r2)
+        np.add.at(self.defence, home, -GOALS_LR * r2)
+        self.mu += GLOBAL_LR * (r1.sum() + r2.sum())
+        self.home += GLOBAL_LR * r1.sum()
+
+    def fit(self, played: pd.DataFrame) -> np.ndarray:
+        """Run through date-ordered results round by round; returns each match's pre-match forecast."""
+        forecasts = np.empty((len(played), len(FORECAST_COLS)))
+        home = self.team_ids(played["team1"].tolist(), played["div"].tolist())
+        away = self.team_ids(played["team2"].tolist(), played["div"].tolist())
+        codes = self.div_codes(played["div"].tolist())
+        goals1 = played["goals1"].to_numpy(float)
+        goals2 = played["goals2"].to_numpy(float)
+        seasons = played["season"].to_numpy()
+        day = pd.to_datetime(played["date"]).dt.normalize().to_numpy()
+
+        bounds = np.flatnonzero(np.r_[True, day[1:] != day[:-1], True])
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if self.season is None or seasons[a] != self.season:
+                self.new_season(seasons[a])
+            self.place(np.r_[home[a:b], away[a:b]], np.r_[codes[a:b], codes[a:b]])
+            forecasts[a:b] = self.forecast(home[a:b], away[a:b])
+            self.update(home[a:b], away[a:b], goals1[a:b], goals2[a:b], forecasts[a:b])
+        return forecasts
+
+    # ---------- Persistence ----------
+    def save(self, root: str, meta: dict):
+        teams = pd.DataFrame({
+            "team": self.teams, "div": [self.divs[d] for d in self.team_div],
+            "elo": self.elo, "attack": self.attack, "defence": self.defence,
+        })
+        feather.write_feather(teams, os.path.join(root, "teams.arrow"))
+        season = self.season.item() if hasattr(self.season, "item") else self.season
+        state = dict(meta, mu=float(self.mu), home=float(self.home), season=season)
+        with open(os.path.join(root, MANIFEST), "w") as f:
+            json.dump(state, f, indent=1)
+
+    @classmethod
+    def load(cls, root: str) -> "RatingModel":
+        model = cls()
+        with open(os.path.join(root, MANIFEST)) as f:
+            state = json.load(f)
+        teams = feather.read_feather(os.path.join(root, "teams.arrow"))
+        model.teams = teams["team"].tolist()
+        model.team_index = {t: i for i, t in enumerate(model.teams)}
+        model.divs = list(dict.fromkeys(teams["div"]))
+        model.div_index = {d: i for i, d in enumerate(model.divs)}
+        model.team_div = np.array(teams["div"].map(model.div_index), dtype=int)
+        model.elo, model.attack, model.defence = (teams[c].to_numpy(float).copy() for c in ("elo", "attack", "defence"))
+        model.mu, model.home, model.season = state["mu"], state["home"], state["season"]
+        return model
+
+
+def _read_state(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"rows": 0, "hash": None}
+
+
+def update_forecasts(matches: pd.DataFrame, root: str = MODEL_DIR, refit: bool = False) -> tuple[pd.DataFrame, int]:
+    """Fill the forecast columns of `matches`, applying only results the stored model has not seen.
+
+    Returns the updated frame and how many results were applied.
+    """
+    when = pd.to_datetime(matches["date"])
+    played = matches[matches["goals1"].notna() & matches["goals2"].notna()]
+    played = played.loc[when[played.index].sort_values(kind="stable").index]
+    keys = played[KEY_COLS]
+
+    state = _read_state(root)
+    n = state["rows"]
+    forecasts_path = os.path.join(root, "forecasts.arrow")
+    resume = (not refit and os.path.exists(forecasts_path) and len(played) >= n
+              and _rows_hash(keys.iloc[:n]) == state["hash"])
+    if resume:
+        model = RatingModel.load(root)
+        old = feather.read_feather(forecasts_path).to_numpy()
+    else:
+        model, old, n = RatingModel(), np.empty((0, len(FORECAST_COLS))), 0
+
+    new = played.iloc[n:]
+    prematch = np.vstack([old, model.fit(new)]) if len(new) else old
+
+    os.makedirs(root, exist_ok=True)
+    feather.write_feather(pd.DataFrame(prematch, columns=FORECAST_COLS), forecasts_path)
+    model.save(root, {"rows": len(played), "hash": _rows_hash(keys)})
+
+    out = matches.copy()
+    out.loc[played.index, FORECAST_COLS] = prematch
+    fixtures = matches.index.difference(played.index)
+    if len(fixtures):
+        rows = matches.loc[fixtures]
+        home = model.team_ids(rows["team1"].tolist(), rows["div"].tolist())
+        away = model.team_ids(rows["team2"].tolist(), rows["div"].tolist())
+        codes = model.div_codes(rows["div"].tolist())
+        model.place(np.r_[home, away], np.r_[codes, codes])
+        out.loc[fixtures, FORECAST_COLS] = model.forecast(home, away)
+    return out, len(new)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=match_store.SOURCE_CSV, help="matches CSV to update in place")
+    parser.add_argument("--refit", action="store_true", help="ignore the stored model and fit from scratch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Round-trip parsing, so unchanged forecasts compare equal and the CSV is left alone
+    matches = pd.read_csv(args.csv, float_precision="round_trip")
+    updated, applied = update_forecasts(matches, refit=args.refit)
+    if not updated.equals(matches):
+        tmp = f"{args.csv}.{os.getpid()}.tmp"
+        updated.to_csv(tmp, index=False)
+        os.replace(tmp, args.csv)
+        match_store.build_store(args.csv)
+    print(f"{applied} results applied, {len(updated)} forecasts in {args.csv} "
+          f"({time.perf_counter() - start:.2f}s)")
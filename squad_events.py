@@ -0,0 +1,314 @@
+"""Long-format event store built from every squad-grid-YYYY.csv.
+
+Each wide season grid (one column per player, one row per match) is parsed
+into rows of (season, match, date, opposition, division, venue, player, event,
+minute, sub_no). Seasons are stored as one Arrow file each under squad-events/
+and only re-parsed when their source CSV changes.
+
+Cell grammar, as used in the grids:
+    x                     started
+    x 2 off 70            started, replaced by sub 2 at 70
+    sub 2 on 70 2         came on as sub 2 at 70
+    g 12 55 / g pen 30    goals (minutes optional, "pen" marks a penalty)
+    y / r / red@80        yellow / red card
+    uu                    unused substitute
+
+    python squad_events.py [player name]
+"""
+import glob
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+GRID_GLOB = "squad-grid-*.csv"
+STORE_DIR = "squad-events"
+MANIFEST = "manifest.json"
+# Bump when parsing changes, so stored seasons are re-parsed
+PARSER_VERSION = 2
+
+EVENT_TYPES = ["start", "sub_on", "sub_off", "goal", "pen", "og", "yellow", "red", "unused"]
+
+# ---------- Player columns ----------
+META_COLS_KNOWN = {
+    "unnamed: 0","date","opposition","goals1","goals2","venue","kickoff",
+    "attendance","awayatt","post.position","opp.post.position","referee",
+    "result","notes","competition","round","division","position (after)","opp position","stadium"
+}
+def get_player_cols(df_: pd.DataFrame):
+    meta_present = {c for c in df_.columns if c.lower() in META_COLS_KNOWN}
+    with_space = [c for c in df_.columns if (" " in c and c not in meta_present)]
+    return with_space if with_space else [c for c in df_.columns if c not in meta_present]
+
+# ---------- Cell parsing ----------
+TOKEN_RE = re.compile(r"red@(\d+)|[a-z]+|\d+")
+
+def _minute(tok):
+    return int(tok) if tok is not None and tok.isdigit() else None
+
+@lru_cache(maxsize=4096)
+def parse_events(s: str) -> tuple[tuple[str, int | None, int | None], ...]:
+    """(event, minute, sub_no) triples for a normalised (stripped, lower-case) cell string."""
+    tokens = [m.group(0) for m in TOKEN_RE.finditer(s)]
+    n = len(tokens)
+    events = []
+    in_goals = False
+    pending = None  # goal kind announced by "g"/"pen" but not yet given a minute
+
+    def flush():
+        nonlocal pending
+        if pending:
+            events.append((pending, None, None))
+        pending = None
+
+    i = 0
+    while i < n:
+        t = tokens[i]
+        nxt = tokens[i+1] if i + 1 < n else None
+
+        if t.isdigit() and in_goals:
+            events.append((pending or "goal", int(t), None))
+            pending = None
+            i += 1
+            continue
+        if t == "pen" and in_goals:
+            # "g pen 30" is one penalty; "pen pen" is two without minutes
+            if pending == "pen":
+                flush()
+            pending = "pen"
+            i += 1
+            continue
+        if t == "na" and in_goals:
+            events.append((pending or "goal", None, None))
+            pending = None
+            i += 1
+            continue
+
+        # Any other token closes a run of goal minutes
+        if in_goals:
+            flush()
+            in_goals = False
+
+        if t == "x":
+            # "x 2 ... off 70": the starter is replaced by sub number 2
+            events.append(("start", 0, _minute(nxt)))
+            if _minute(nxt) is not None:
+                i += 1
+        elif t == "sub" and i + 3 < n and tokens[i+2] == "on":
+            events.append(("sub_on", _minute(tokens[i+3]), _minute(nxt)))
+            i += 3
+            # the sub number is repeated after the minute
+            if i + 1 < n and tokens[i+1] == nxt:
+                i += 1
+        elif t == "off":
+            sub_no = next((e[2] for e in events if e[0] in ("start", "sub_on") and e[2] is not None), None)
+            events.append(("sub_off", _minute(nxt), sub_no))
+            if _minute(nxt) is not None:
+                i += 1
+        elif t == "g":
+            in_goals = True
+            pending = "goal"
+        elif t == "og":
+            events.append(("og", _minute(nxt), None))
+            if _minute(nxt) is not None:
+                i += 1
+        elif t in ("y", "r"):
+            events.append(("yellow" if t == "y" else "red", _minute(nxt), None))
+            if _minute(nxt) is not None:
+                i += 1
+        elif t.startswith("red@"):
+            events.append(("red", int(t[4:]), None))
+        elif t == "uu":
+            events.append(("unused", None, None))
+        i += 1
+
+    if in_goals:
+        flush()
+    return tuple(events)
+
+# ---------- Ingest ----------
+def season_of(path: str) -> int:
+    return int(os.path.splitext(os.path.basename(path))[0].split("-")[-1])
+
+def parse_season(path: str) -> pd.DataFrame:
+    """Long event table for one squad-grid CSV."""
+    df = pd.read_csv(path)
+    players = get_player_cols(df)
+    matches = pd.DataFrame({
+        "season": season_of(path),
+        "match": np.arange(1, len(df) + 1),
+        "date": pd.to_datetime(df["Date"], errors="coerce"),
+        "opposition": df["opposition"],
+        "division": df["division"],
+        "venue": df["venue"],
+    })
+
+    # One row per non-empty (match, player) cell
+    cells = df[players].to_numpy(dtype=object)
+    row, col = np.nonzero(pd.notna(cells))
+    strings = pd.Series(cells[row, col]).astype(str).str.strip().str.lower()
+    codes, uniques = pd.factorize(strings)
+
+    # Parse each distinct cell string once, then join events back by code
+    parsed = [(code, *event) for code, s in enumerate(uniques) for event in parse_events(s)]
+    lookup = pd.DataFrame(parsed, columns=["code", "event", "minute", "sub_no"])
+    long = pd.DataFrame({"code": codes, "row": row, "player": np.asarray(players, dtype=object)[col]})
+    events = long.merge(lookup, on="code").drop(columns="code")
+    events = pd.concat([matches.iloc[events["row"]].reset_index(drop=True), events.drop(columns="row")], axis=1)
+
+    events["event"] = pd.Categorical(events["event"], categories=EVENT_TYPES)
+    events["minute"] = events["minute"].astype("Int16")
+    events["sub_no"] = events["sub_no"].astype("Int8")
+    return events.sort_values(["match", "player"]).reset_index(drop=True)
+
+def _stamp(path: str) -> dict:
+    st = os.stat(path)
+    return {"mtime": st.st_mtime, "size": st.st_size, "parser": PARSER_VERSION}
+
+def build_store(pattern: str = GRID_GLOB, root: str = STORE_DIR) -> dict:
+    """Re-parse only the seasons whose CSV changed since the last build; return the manifest."""
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+
+    os.makedirs(root, exist_ok=True)
+    current = {}
+    for path in sorted(glob.glob(pattern)):
+        season = str(season_of(path))
+        current[season] = _stamp(path)
+        if manifest.get(season) != current[season]:
+            feather.write_feather(parse_season(path), os.path.join(root, f"season={season}.arrow"))
+
+    for season in set(manifest) - set(current):
+        os.remove(os.path.join(root, f"season={season}.arrow"))
+    if current != manifest:
+        with open(os.path.join(root, MANIFEST), "w") as f:
+            json.dump(current, f, indent=1)
+    return current
+
+# ---------- Minutes played ----------
+MATCH_MINUTES = 90
+# Any event after 90 minutes means the tie went to extra time
+EXTRA_TIME_MINUTES = 120
+# Divisions of non-competitive matches, which do not count towards availability
+FRIENDLIES = {"Friendly", "friendly"}
+
+def minutes_played(events: pd.DataFrame) -> pd.DataFrame:
+    """On/off minute and minutes played for every (season, match, player) with a squad entry.
+
+    Starters come on at 0 and subs at their sub-on minute; players leave at the
+    earlier of a sub-off or red card, otherwise at full time (120 minutes when
+    the match went to extra time). Unused subs get 0; subs with no recorded
+    minute get NA.
+    """
+    ev = events["event"].astype(str)
+    frame = pd.DataFrame({
+        "season": events["season"],
+        "match": events["match"],
+        "player": events["player"].astype(str),
+        "on": events["minute"].where(ev.isin(["start", "sub_on"])).astype("Float64"),
+        "off": events["minute"].where(ev.isin(["sub_off", "red"])).astype("Float64"),
+        "entered": ev.isin(["start", "sub_on"]),
+        "started": ev == "start",
+        "goals": ev.isin(["goal", "pen"]),
+        "friendly": events["division"].astype(str).isin(FRIENDLIES),
+    })
+    per = frame.groupby(["season", "match", "player"], sort=False).agg(
+        on=("on", "min"), off=("off", "min"),
+        entered=("entered", "any"), started=("started", "any"), goals=("goals", "sum"), friendly=("friendly", "any"),
+    )
+    last = events.groupby(["season", "match"])["minute"].max()
+    length = pd.Series(np.where(last > MATCH_MINUTES, EXTRA_TIME_MINUTES, MATCH_MINUTES), index=last.index)
+    per["match_minutes"] = length.reindex(per.index.droplevel("player")).to_numpy()
+    off = per["off"].fillna(per["match_minutes"]).clip(upper=per["match_minutes"])
+    per["minutes"] = (off - per["on"]).clip(lower=0)
+    per.loc[~per["entered"], "minutes"] = 0
+    return per.reset_index()
+
+def minutes_matrix(minutes: pd.DataFrame) -> pd.DataFrame:
+    """Players x (season, match) minutes; NaN where the player was not in the squad."""
+    return minutes.pivot_table(index="player", columns=["season", "match"], values="minutes", aggfunc="sum", dropna=False)
+
+def season_minutes(minutes: pd.DataFrame) -> pd.DataFrame:
+    """Per-player season totals: minutes, starts, goals, minutes per goal and availability %.
+
+    Availability is minutes played over the minutes of the season's competitive
+    matches with a recorded line-up; friendlies count towards the totals only.
+    """
+    # Matches with a recorded line-up are the ones a player could have played in
+    competitive = minutes[~minutes["friendly"]]
+    possible = competitive.drop_duplicates(["season", "match"]).groupby("season")["match_minutes"].sum()
+    totals = minutes.groupby(["season", "player"]).agg(
+        apps=("entered", "sum"), starts=("started", "sum"), minutes=("minutes", "sum"), goals=("goals", "sum"),
+    )
+    totals["mins_per_goal"] = (totals["minutes"] / totals["goals"].where(totals["goals"] > 0)).round(1)
+    played = competitive.groupby(["season", "player"])["minutes"].sum().reindex(totals.index, fill_value=0)
+    possible = possible.reindex(totals.index.get_level_values("season")).to_numpy()
+    totals["availability_pct"] = (100 * played / possible).round(1)
+    return totals.reset_index()
+
+# ---------- Query ----------
+class EventStore:
+    """All seasons' events sorted by player, with player and season row indexes."""
+
+    def __init__(self, root: str = STORE_DIR):
+        with open(os.path.join(root, MANIFEST)) as f:
+            seasons = sorted(json.load(f), key=int)
+        events = pd.concat(
+            [feather.read_table(os.path.join(root, f"season={s}.arrow"), memory_map=True).to_pandas() for s in seasons],
+            ignore_index=True,
+        )
+        events["player"] = events["player"].astype("category")
+        for col in ("opposition", "division", "venue"):
+            events[col] = events[col].astype("category")
+        self.events = events.sort_values(["player", "season", "match"], kind="stable").reset_index(drop=True)
+
+        # player -> contiguous row range; season -> row positions
+        players = self.events["player"].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, players[1:] != players[:-1], True])
+        self.player_index = {players[a]: slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])}
+        self.season_index = {s: idx for s, idx in self.events.groupby("season").indices.items()}
+
+    @property
+    def players(self) -> list[str]:
+        return sorted(self.player_index)
+
+    def player_events(self, player: str) -> pd.DataFrame:
+        return self.events.iloc[self.player_index.get(player, slice(0, 0))]
+
+    def season_events(self, season: int) -> pd.DataFrame:
+        return self.events.iloc[self.season_index.get(season, [])]
+
+    def career(self, player: str) -> pd.DataFrame:
+        """Per-season appearances, starts, goals and cards for one player, with a career total row."""
+        ev = self.player_events(player)
+        counts = pd.crosstab(ev["season"], ev["event"].astype(str)).reindex(columns=EVENT_TYPES, fill_value=0)
+        line = pd.DataFrame({
+            "apps": counts["start"] + counts["sub_on"],
+            "starts": counts["start"],
+            "sub_apps": counts["sub_on"],
+            "unused": counts["unused"],
+            "goals": counts["goal"] + counts["pen"],
+            "pens": counts["pen"],
+            "yellows": counts["yellow"],
+            "reds": counts["red"],
+        })
+        line.index = line.index.astype(str)
+        line.loc["Total"] = line.sum()
+        return line
+
+
+if __name__ == "__main__":
+    build_store()
+    store = EventStore()
+    if len(sys.argv) > 1:
+        print(store.career(" ".join(sys.argv[1:])).to_string())
+    else:
+        print(f"{len(store.events)} events for {len(store.player_index)} players")
@@ -0,0 +1,72 @@
+"""StatsBomb match tables indexed by match_id.
+
+Each per-match table is read once, sorted by match_id and sliced by
+contiguous row ranges, so selecting a match is a dict lookup rather than a
+boolean scan over the whole file. Team and player names are stored as
+categoricals.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+MATCHES_CSV = "statsbomb-matches.csv"
+SUMMARY_CSV = "statsbomb-summary_stats.csv"
+POSITIONS_CSV = "statsbomb-player_positions.csv"
+PASSES_CSV = "statsbomb-passing_network.csv"
+SOURCES = [MATCHES_CSV, SUMMARY_CSV, POSITIONS_CSV, PASSES_CSV]
+
+CATEGORICAL_COLS = ["team_name", "player_name", "passer", "receiver"]
+PASS_COLS = ["match_id", "passer", "receiver", "pass_count"]
+
+
+def source_stamp(paths=SOURCES) -> tuple:
+    """(path, mtime) for each source that exists, to key caches on."""
+    return tuple((p, os.path.getmtime(p)) for p in paths if os.path.exists(p))
+
+
+class MatchTable:
+    """One per-match table sorted by match_id, with match_id -> row slice."""
+
+    def __init__(self, df: pd.DataFrame):
+        for col in CATEGORICAL_COLS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        self.frame = df.sort_values("match_id", kind="stable").reset_index(drop=True)
+        ids = self.frame["match_id"].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1], True]) if len(ids) else np.array([0])
+        self.slices = {int(ids[a]): slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])}
+
+    def __getitem__(self, match_id) -> pd.DataFrame:
+        return self.frame.iloc[self.slices.get(int(match_id), slice(0, 0))]
+
+    def __contains__(self, match_id) -> bool:
+        return int(match_id) in self.slices
+
+
+def _read(path: str, columns=None) -> pd.DataFrame:
+    # Files are R exports; their row-name column is kept as "Unnamed: 0", as before indexing
+    if not os.path.exists(path) and columns is not None:
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(path)
+
+
+class StatsBombIndex:
+    def __init__(self):
+        matches = _read(MATCHES_CSV)
+        matches["label"] = (
+            matches["home_team.home_team_name"] + " vs " + matches["away_team.away_team_name"]
+            + " (" + matches["match_date"].astype(str) + ")"
+        )
+        self.matches = matches.set_index("match_id")
+        # label -> match_id in file order, first occurrence wins as in the old selectbox lookup
+        first = ~matches["label"].duplicated()
+        self.labels = dict(zip(matches["label"][first], matches["match_id"][first]))
+
+        self.summary = MatchTable(_read(SUMMARY_CSV))
+        self.positions = MatchTable(_read(POSITIONS_CSV))
+        # The passing network export is optional; without it every match has no passes
+        self.passes = MatchTable(_read(PASSES_CSV, PASS_COLS))
+
+    def match(self, match_id) -> pd.Series:
+        return self.matches.loc[int(match_id)]
@@ -0,0 +1,160 @@
+"""Durable local queue for crowd-sourced submissions.
+
+Rows are written to a SQLite database (WAL mode) as soon as the form is
+submitted, each with a unique idempotency key. A background thread flushes
+pending rows to a sink in batches, retrying with exponential backoff. Every row
+is marked as attempted before it is sent, and retried rows are first checked
+against the keys already in the sink, so a timeout that actually succeeded is
+never written twice.
+
+Sinks need two methods:
+    append_rows(rows)        write a batch of rows (each ending in its key)
+    existing_keys(keys)      the subset of `keys` already present in the sink
+"""
+import csv
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+QUEUE_PATH = "submission-queue.sqlite3"
+BATCH_SIZE = 50
+BACKOFF_BASE = 2.0     # seconds
+BACKOFF_MAX = 300.0
+
+
+# ---------- Sinks ----------
+class GoogleSheetSink:
+    """Appends rows to a gspread worksheet; the idempotency key goes in `key_column` (1-based)."""
+
+    def __init__(self, sheet, key_column: int):
+        self.sheet = sheet
+        self.key_column = key_column
+
+    def append_rows(self, rows):
+        self.sheet.append_rows(rows)
+
+    def existing_keys(self, keys):
+        # Only called for retried rows, so the extra read is rare
+        return set(keys) & set(self.sheet.col_values(self.key_column))
+
+
+class CsvSink:
+    """Local file stand-in for the Google Sheet (also handy for tests)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def append_rows(self, rows):
+        with open(self.path, "a", newline="") as f:
+            csv.writer(f).writerows(rows)
+
+    def existing_keys(self, keys):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline="") as f:
+            return set(keys) & {row[-1] for row in csv.reader(f) if row}
+
+
+# ---------- Queue ----------
+class SubmissionQueue:
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS submissions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    created REAL NOT NULL,
+                    payload TEXT NOT NULL,
+                    sent REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_try REAL NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS pending ON submissions (sent, next_try)")
+        self.wake = threading.Event()
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the queue safe across threads
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA synchronous=NORMAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def enqueue(self, row_values: list) -> str:
+        """Durably store one submission row; returns its idempotency key."""
+        key = uuid.uuid4().hex
+        with self._connect() as con:
+            con.execute(
+                "INSERT INTO submissions (key, created, payload) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(row_values, default=str)),
+            )
+        self.wake.set()
+        return key
+
+    def pending_count(self) -> int:
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM submissions WHERE sent IS NULL").fetchone()[0]
+
+    def flush(self, sink, batch_size: int = BATCH_SIZE) -> int:
+        """Send one batch of due rows to `sink`; returns the number of rows sent."""
+        now = time.time()
+        with self._connect() as con:
+            batch = con.execute(
+                "SELECT id, key, payload, attempts FROM submissions "
+                "WHERE sent IS NULL AND next_try <= ? ORDER BY id LIMIT ?",
+                (now, batch_size),
+            ).fetchall()
+            if not batch:
+                return 0
+            # Record the attempt before sending, so a crash mid-send is treated as a retry
+            con.executemany("UPDATE submissions SET attempts = attempts + 1 WHERE id = ?", [(r[0],) for r in batch])
+
+        retried = [key for _, key, _, attempts in batch if attempts > 0]
+        try:
+            already_sent = sink.existing_keys(retried) if retried else set()
+            rows = [json.loads(payload) + [key] for _, key, payload, _ in batch if key not in already_sent]
+            if rows:
+                sink.append_rows(rows)
+        except Exception as exc:
+            attempts = max(r[3] for r in batch) + 1
+            delay = min(BACKOFF_BASE * 2 ** attempts, BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            with self._connect() as con:
+                con.executemany(
+                    "UPDATE submissions SET next_try = ?, last_error = ? WHERE id = ?",
+                    [(now + delay, repr(exc), r[0]) for r in batch],
+                )
+            raise
+
+        with self._connect() as con:
+            con.executemany("UPDATE submissions SET sent = ? WHERE id = ?", [(time.time(), r[0]) for r in batch])
+        return len(batch)
+
+    def start_flusher(self, sink, interval: float = 5.0) -> threading.Thread:
+        """Flush in a daemon thread: immediately after each enqueue, and every `interval` seconds."""
+        def run():
+            while True:
+                try:
+                    while self.flush(sink):
+                        pass
+                except Exception:
+                    # backoff is recorded on the rows; try again next tick
+                    logging.getLogger(__name__).warning("Submission flush failed", exc_info=True)
+                self.wake.wait(interval)
+                self.wake.clear()
+
+        thread = threading.Thread(target=run, name="submission-flusher", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,55 @@
+import csv
+import time
+
+import pandas as pd
+
+import consensus
+
+
+def _row(label, author, **fields):
+    values = dict.fromkeys(consensus.SUBMISSION_FIELDS, "")
+    values.update(timestamp="2024-01-06 15:00:00", match_label=label, author=author, **fields)
+    return [values[f] for f in consensus.SUBMISSION_FIELDS]
+
+
+def test_sheet_export_mixes_keyed_and_unkeyed_rows(tmp_path, monkeypatch):
+    # No local queue or legacy CSV, so only the sheet rows are read
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "sheet.csv"
+    rows = [
+        # Written directly by the form before the queue: no player IDs, no key
+        _row("A", "")[:-1],
+        _row("A", "")[:-1],
+        _row("A", "Bob")[:-1],
+        # Queued before player IDs were added
+        _row("B", "Jeff")[:-1] + ["k1"],
+        # Queued with player IDs, including a retried duplicate
+        _row("C", "Terry", player_ids='{"oafc_no1": []}') + ["k2"],
+        _row("C", "Terry", player_ids='{"oafc_no1": []}') + ["k2"],
+        ["too", "short"],
+    ]
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+    df = consensus.read_sheet_export(str(path))
+    assert len(df) == 6
+    unkeyed = df[df["match_label"] == "A"]
+    assert unkeyed["key"].isna().all()
+    assert unkeyed["author"].tolist() == ["", "", "Bob"]
+    assert df.loc[df["match_label"] == "B", "key"].tolist() == ["k1"]
+    keyed = df[df["match_label"] == "C"]
+    assert keyed["key"].tolist() == ["k2", "k2"]
+    assert keyed["author"].tolist() == ["Terry", "Terry"]
+    assert keyed["player_ids"].tolist() == ['{"oafc_no1": []}'] * 2
+
+    subs = consensus.read_submissions(0, sheet_csv=str(path), legacy_csv="none.csv")
+    # Unkeyed rows are all kept; the retried keyed row is kept once
+    assert subs["match_label"].value_counts().to_dict() == {"A": 3, "B": 1, "C": 1}
+
+
+def test_epoch_seconds_reads_utc_and_local_timestamps():
+    stamps = pd.Series(["2024-07-01 12:00:00+00:00", "2024-07-01 12:00:00", None])
+    seconds = consensus._epoch_seconds(stamps)
+    assert seconds[0] == pd.Timestamp("2024-07-01 12:00", tz="UTC").timestamp()
+    assert seconds[1] == time.mktime(time.strptime("2024-07-01 12:00:00", "%Y-%m-%d %H:%M:%S"))
+    assert pd.isna(seconds[2])